@@ -14,6 +14,8 @@ import os
 import argparse
 import tempfile
 import logging
+import queue
+import threading
 import colorama
 from typing import Dict, Any, List, Optional, Tuple
 from colorama import Fore, Style
@@ -91,6 +93,16 @@ def parse_arguments():
                          help='Anthropic API key (can also be set as ANTHROPIC_API_KEY environment variable)')
     summary_group.add_argument('--max-response-tokens', type=int,
                          help='Maximum number of tokens for model responses (defaults to 3000 for OpenAI and 8000 for Claude)')
+    summary_group.add_argument('--stream', action='store_true',
+                         help='Print each summary to the console as it is generated')
+    summary_group.add_argument('--summary-cache', type=str,
+                         help='Path to a cache file for reusing summaries of near-duplicate papers, such as new versions of a preprint (OpenAI only)')
+    summary_group.add_argument('--cache-dir', type=str, default='~/.cache/biorxiv_summarizer',
+                         help='Directory for caching extracted text and summaries, so re-running on the same PDFs with the same settings is nearly free')
+    summary_group.add_argument('--no-cache', action='store_true',
+                         help='Always generate new summaries instead of reusing cached ones')
+    summary_group.add_argument('--batch', action='store_true',
+                         help='Submit all summary requests through the provider\'s batch API, which costs half as much but can take up to 24 hours')
     
     # Google Drive parameters
     drive_group = parser.add_argument_group('Google Drive Parameters')
@@ -166,7 +178,9 @@ def initialize_components(args):
             model=args.model,
             api_provider=args.api_provider,
             anthropic_api_key=args.anthropic_key,
-            max_response_tokens=args.max_response_tokens
+            max_response_tokens=args.max_response_tokens,
+            summary_cache_path=args.summary_cache,
+            cache_dir=None if args.no_cache else args.cache_dir
         )
     except ValueError as e:
         logger.error(f"{Fore.RED}Error initializing summarizer: {e}{Style.RESET_ALL}")
@@ -240,11 +254,42 @@ def search_papers_based_on_args(args, searcher, rank_weights):
 
 def process_papers(papers, args, summarizer, uploader=None, drive_folder_id=None):
     """Process each paper (download, summarize, upload)."""
+    # Upload each paper's files in the background while the next paper is being processed
+    upload_queue = None
+    upload_thread = None
+    if uploader and drive_folder_id:
+        upload_queue = queue.Queue()
+        upload_thread = threading.Thread(target=upload_worker, args=(upload_queue, uploader, drive_folder_id), daemon=True)
+        upload_thread.start()
+    
+    try:
+        summarize_papers(papers, args, summarizer, upload_queue)
+    finally:
+        if upload_thread is not None:
+            upload_queue.put(None)
+            logger.info("Waiting for Google Drive uploads to finish...")
+            upload_thread.join()
+            uploader.close()
+
+def upload_worker(upload_queue, uploader, drive_folder_id):
+    """Upload the lists of files put on the queue to Google Drive, until None is put on it."""
+    while True:
+        file_paths = upload_queue.get()
+        if file_paths is None:
+            return
+        try:
+            uploader.upload_files(file_paths, drive_folder_id)
+        except Exception as e:
+            logger.error(f"Error uploading to Google Drive: {e}")
+
+def summarize_papers(papers, args, summarizer, upload_queue=None):
+    """Download and summarize each paper, queueing its PDF and summary for upload."""
     logger.info(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
     logger.info(f"{Fore.CYAN}Starting to process {len(papers)} papers{Style.RESET_ALL}")
     logger.info(f"{Fore.CYAN}{'='*50}{Style.RESET_ALL}")
     
     api_quota_exceeded = False  # Flag to track if we've hit API quota limits
+    batch_papers = []  # (pdf_path, paper) pairs to summarize together in batch mode
     
     # Add a new CLI argument for skipping the prompt for existing PDFs
     skip_prompt = getattr(args, 'skip_prompt', False)
@@ -273,64 +318,92 @@ def process_papers(papers, args, summarizer, uploader=None, drive_folder_id=None
             logger.info(f"Paper downloaded to: {pdf_path}")
             continue
             
+        # In batch mode, summarize all papers together once they have been downloaded
+        if args.batch:
+            batch_papers.append((pdf_path, paper))
+            continue
+            
         # Generate summary
         summary_result = summarizer.generate_summary(
             pdf_path, 
             paper, 
-            max_pdf_pages=args.max_pdf_pages
+            max_pdf_pages=args.max_pdf_pages,
+            on_token=(lambda text: print(text, end='', flush=True)) if args.stream else None
         )
         
-        # Check if the result is an error dictionary
-        if isinstance(summary_result, dict) and 'error' in summary_result:
-            error_type = summary_result.get('error')
-            error_message = summary_result.get('message', 'Unknown error')
-            
-            # Handle quota exceeded errors specially
-            if error_type in ['quota_exceeded', 'rate_limit']:
-                api_quota_exceeded = True
-                logger.error(f"{Fore.RED}API quota or rate limit exceeded. Will download remaining papers without generating summaries.{Style.RESET_ALL}")
-                logger.error(f"Error details: {error_message}")
-                logger.info(f"Paper downloaded to: {pdf_path}")
-                continue
-                
-            # For other errors, create a simple error summary
-            summary = f"# Summary could not be generated\n\n**Error:** {error_message}\n\nThe paper has been downloaded to: {pdf_path}"
-        else:
-            # No error, use the summary as is
-            summary = summary_result
+        # End the streamed summary's last line so the next log message starts on its own line
+        if args.stream:
+            print()
         
-        # Save summary to a file with the same naming format as the PDF
-        # Extract the filename without extension from pdf_path
-        pdf_filename = os.path.basename(pdf_path)
-        summary_filename = os.path.splitext(pdf_filename)[0] + ".md"
-        summary_path = os.path.join(args.output_dir, summary_filename)
+        if not save_summary(summary_result, pdf_path, args, upload_queue):
+            api_quota_exceeded = True
+    
+    if batch_papers:
+        if args.stream:
+            logger.warning("Summaries can't be streamed in batch mode; they will be saved once the batch completes")
+        logger.info(f"{Fore.BLUE}Submitting summaries of {len(batch_papers)} papers as a batch; this can take up to 24 hours{Style.RESET_ALL}")
+        summary_results = summarizer.summarize_batch(batch_papers, max_pdf_pages=args.max_pdf_pages)
+        for (pdf_path, paper), summary_result in zip(batch_papers, summary_results):
+            save_summary(summary_result, pdf_path, args, upload_queue)
+
+def save_summary(summary_result, pdf_path, args, upload_queue=None):
+    """
+    Save a paper's summary next to its PDF and queue both for upload to Google Drive if requested.
+    
+    Returns:
+        False if the summary failed because the API quota or rate limit was exceeded, True otherwise
+    """
+    # Check if the result is an error dictionary
+    if isinstance(summary_result, dict) and 'error' in summary_result:
+        error_type = summary_result.get('error')
+        error_message = summary_result.get('message', 'Unknown error')
         
-        try:
-            with open(summary_path, 'w', encoding='utf-8') as f:
-                f.write(summary)
+        # Handle quota exceeded errors specially
+        if error_type in ['quota_exceeded', 'rate_limit']:
+            logger.error(f"{Fore.RED}API quota or rate limit exceeded. Will download remaining papers without generating summaries.{Style.RESET_ALL}")
+            logger.error(f"Error details: {error_message}")
+            logger.info(f"Paper downloaded to: {pdf_path}")
+            return False
             
-            # Verify the file was actually created
-            if os.path.exists(summary_path) and os.path.getsize(summary_path) > 0:
-                logger.info(f"{Fore.GREEN}Saved summary to: {summary_path}{Style.RESET_ALL}")
-            else:
-                logger.warning(f"Summary file was created but appears to be empty or missing: {summary_path}")
-        except Exception as e:
-            logger.error(f"Error saving summary file: {e}")
-            logger.error(f"Attempted to save to: {summary_path}")
-            # Try saving to current directory as fallback
-            fallback_path = os.path.join(os.path.abspath('.'), summary_filename)
-            try:
-                with open(fallback_path, 'w', encoding='utf-8') as f:
-                    f.write(summary)
-                logger.info(f"{Fore.GREEN}Saved summary to fallback location: {fallback_path}{Style.RESET_ALL}")
-                summary_path = fallback_path  # Update path for Google Drive upload
-            except Exception as e2:
-                logger.error(f"Failed to save summary even to fallback location: {e2}")
+        # For other errors, create a simple error summary
+        summary = f"# Summary could not be generated\n\n**Error:** {error_message}\n\nThe paper has been downloaded to: {pdf_path}"
+    else:
+        # No error, use the summary as is
+        summary = summary_result
+    
+    # Save summary to a file with the same naming format as the PDF
+    # Extract the filename without extension from pdf_path
+    pdf_filename = os.path.basename(pdf_path)
+    summary_filename = os.path.splitext(pdf_filename)[0] + ".md"
+    summary_path = os.path.join(args.output_dir, summary_filename)
+    
+    try:
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(summary)
         
-        # Upload the paper and its summary to Google Drive if using Google Drive
-        if uploader and drive_folder_id:
-            uploader.upload_file(pdf_path, drive_folder_id)
-            uploader.upload_file(summary_path, drive_folder_id)
+        # Verify the file was actually created
+        if os.path.exists(summary_path) and os.path.getsize(summary_path) > 0:
+            logger.info(f"{Fore.GREEN}Saved summary to: {summary_path}{Style.RESET_ALL}")
+        else:
+            logger.warning(f"Summary file was created but appears to be empty or missing: {summary_path}")
+    except Exception as e:
+        logger.error(f"Error saving summary file: {e}")
+        logger.error(f"Attempted to save to: {summary_path}")
+        # Try saving to current directory as fallback
+        fallback_path = os.path.join(os.path.abspath('.'), summary_filename)
+        try:
+            with open(fallback_path, 'w', encoding='utf-8') as f:
+                f.write(summary)
+            logger.info(f"{Fore.GREEN}Saved summary to fallback location: {fallback_path}{Style.RESET_ALL}")
+            summary_path = fallback_path  # Update path for Google Drive upload
+        except Exception as e2:
+            logger.error(f"Failed to save summary even to fallback location: {e2}")
+    
+    # Queue the paper and its summary for upload if using Google Drive
+    if upload_queue is not None:
+        upload_queue.put([pdf_path, summary_path])
+    
+    return True
 
 def main():
     """Main function to run the workflow."""
@@ -6,33 +6,319 @@ This module provides functionality to generate summaries of scientific papers.
 """
 
 import os
+import json
 import logging
 import re
 import math
-import gc
-import tempfile
-from typing import Dict, Any, Optional, List, Union, Tuple
-import PyPDF2
+import string
+import asyncio
+import itertools
+from collections import Counter
+from typing import Dict, Any, Optional, List, Union, Tuple, Callable, Iterable, Iterator
+import pypdfium2 as pdfium
 from openai import OpenAI
 import anthropic
 from colorama import Fore, Style
 import tiktoken
 import psutil
 from tqdm import tqdm
-import threading
 import sys
 import time
 
+from .summary_cache import SemanticSummaryCache, DiskCache, file_sha256, text_sha256
+
 # Get logger
 logger = logging.getLogger('biorxiv_summarizer')
 
+# Context window sizes by model name; versioned model names match on the longest known prefix
+_MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo-16k": 16384,
+    "gpt-3.5-turbo": 16385,
+    "claude": 100000,
+}
+_DEFAULT_CONTEXT_TOKENS = 4000
+
+# Extraction stops once the text exceeds this multiple of the per-chunk token budget
+_EXTRACTION_BUDGET_FACTOR = 3
+
+# Lines repeated on every page of a preprint (running headers, page numbers, margin line numbers).
+# Line ends are normalized before these patterns run, but they also accept PDFium's "\r\n" so
+# they stay correct when applied to raw page text.
+_BOILERPLATE_RE = re.compile(r"^[ \t]*(?:bioRxiv preprint doi:[^\r\n]*|Page \d+ of \d+|\d+)[ \t\r]*(?:\n|$)", re.MULTILINE)
+
+# Heading that starts the reference list, which is not worth summarizing
+_REFERENCES_RE = re.compile(r"(?:^|\n)[ \t]*(?:References|Bibliography|Literature Cited)[ \t]*\r?\n", re.IGNORECASE)
+
+# Headings of sections that many preprints place after the reference list (Methods, Supplementary
+# material), where extraction resumes after skipping the references
+_POST_REFERENCES_RE = re.compile(
+    r"(?:^|\n)[ \t]*(?:\d+\.?[ \t]*)?(?:(?:Materials and |Online |STAR ?)?Methods|Methods and Materials|"
+    r"Supplementary (?:Materials?|Information|Methods|Figures|Tables|Text|Notes?)|Supplemental (?:Materials?|Information|Methods|Figures|Tables)|"
+    r"Appendix|Appendices|Extended Data)\b[^\n]{0,40}\r?\n",
+    re.IGNORECASE
+)
+
+# Whitespace in extracted text: PDFium ends lines with "\r\n" and pads columns with runs of
+# spaces, neither of which tells the model anything. Blank lines separate paragraphs, so runs
+# of them are kept as a single blank line.
+_LINE_END_RE = re.compile(r"[ \t]*\r?\n|\r")
+_SPACE_RUN_RE = re.compile(r"[ \t\f\v]{2,}")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# Affiliation lines in the author block on the first page (e.g. "2 Department of Genetics, ...")
+_AFFILIATION_RE = re.compile(
+    r"^[ \t]*[\d*\u2020\u2021\u00a7, ]*(?:Department|Dept\.|Institute|University|School|Faculty|Division|"
+    r"Laboratory|Center|Centre|College|Hospital) (?:of|for) [^.\n]*,.*(?:\n|$)",
+    re.MULTILINE
+)
+
+# Bumped whenever the cleanup of extracted text changes, so cached text is extracted again
+_TEXT_CLEANUP_VERSION = "3"
+
+# Number of chunk summaries requested concurrently while the rest of the PDF is extracted
+_CHUNK_WORKERS = 4
+
+# Response token limit of a chunk summary: a quarter of the chunk's tokens, within these bounds,
+# so short chunks (such as the last one of a paper) get proportionally short summaries
+_CHUNK_SUMMARY_MIN_TOKENS = 150
+_CHUNK_SUMMARY_MAX_TOKENS = 1000
+
+# Seconds between status checks of a submitted batch job
+_BATCH_POLL_SECONDS = 30
+
+# Times the API clients retry a request that failed with a rate limit (429), overload or server
+# error before raising. The OpenAI and Anthropic SDKs wait between attempts for the time given
+# in the Retry-After header, or with jittered exponential backoff if there is none.
+_API_MAX_RETRIES = 6
+
+# Default prompt based on scientific_paper_prompt.md
+_DEFAULT_PROMPT = """
+            # Expert Analysis: {TITLE}
+
+            You are a senior scientific researcher with decades of experience as a principal investigator, journal editor, and study section reviewer in biology/bioinformatics. Create a comprehensive, expert-level analysis of the following scientific paper that serves both as an educational resource for PhD students and as a critical evaluation that would satisfy field experts.
+
+            ## 1. Paper Context and Significance
+            - **Research Domain:** [Identify the precise subfield classification]
+            - **Scientific Question:** [Identify the specific scientific gap or question being addressed]
+            - **Background Context:** [Provide brief historical context of this research question]
+            - **Key Technologies/Methods:** [Describe core methodological approaches with technical specificity]
+
+            ## 2. Accessible Summary for Early-Career Researchers
+            [Provide a 3-4 paragraph explanation of the core research, written for a first-year PhD student. Balance accessibility with scientific precision. Define specialized terminology when first used. Highlight what makes this work novel or important in the broader context of the field.]
+
+            ## 3. Key Findings and Contributions
+            - **Primary Findings:** [List the most important results with quantitative details where relevant]
+            - **Methodological Innovations:** [Describe any novel methods or techniques introduced]
+            - **Conceptual Advances:** [Explain theoretical or conceptual contributions]
+            - **Resource Generation:** [Note any datasets, tools, or resources produced]
+
+            ## 4. Critical Analysis
+            - **Strengths:** [Identify the major strengths of the paper]
+            - **Limitations:** [Discuss methodological limitations, interpretative issues, or gaps]
+            - **Alternative Interpretations:** [Consider alternative explanations for the findings]
+            - **Unanswered Questions:** [Identify important questions left unaddressed]
+
+            ## 5. Impact and Future Directions
+            - **Field Impact:** [Assess how this work advances the field]
+            - **Broader Implications:** [Consider implications beyond the immediate research area]
+            - **Follow-up Studies:** [Suggest logical next steps for this research]
+            - **Technical Improvements:** [Recommend methodological refinements]
+
+            Format your analysis in Markdown with clear headings and bullet points where appropriate.
+            """
+
+# Labels of the paper metadata block appended to every prompt (values excluded)
+_METADATA_BLOCK = "\n\nPaper Metadata:\nTitle: \nAuthors: \nDate: \nDOI: \n\nAbstract:\n"
+
+# Characters sampled from the combined chunk summaries to measure their characters per token,
+# and the fraction of the token budget they may fill given the estimate may be off
+_TOKEN_RATIO_SAMPLE_CHARS = 4000
+_TOKEN_ESTIMATE_MARGIN = 0.95
+
+# Strings longer than this are token-counted in slices of about this many characters
+_COUNT_SLICE_CHARS = 100000
+
+# Pages are read until their estimated token count exceeds the request limit by this factor, so
+# a paper whose estimate runs a little high is still counted exactly and sent in one request
+_TOKEN_ESTIMATE_SLACK = 1.15
+
+# Number of leading pages with text that the characters per token of a PDF are measured on; one
+# page (often mostly title, authors and abstract) is not representative of the rest
+_TOKEN_RATIO_SAMPLE_PAGES = 3
+
+# Consolidation prompts, built once and filled in per paper. The custom version makes the
+# model follow the structure of the user's prompt template.
+_CONSOLIDATION_PROMPT_CUSTOM = string.Template("""You are provided with multiple summaries of different parts of the same scientific paper.
+                    Your task is to combine these summaries into a single coherent analysis following EXACTLY the structure and format of the template below.
+                    
+                    Paper Information:
+                    - Title: ${title}
+                    - Authors: ${authors}
+                    - DOI: ${doi}
+                    - Publication Date: ${date}
+                    - Abstract: ${abstract}
+                    
+                    Part Summaries (to be integrated):
+                    ${summaries}
+                    
+                    OUTPUT TEMPLATE (follow this EXACT structure):
+                    ${prompt}
+                    """)
+
+_CONSOLIDATION_PROMPT_DEFAULT = string.Template("""You are provided with multiple summaries of different parts of the same scientific paper. 
+                    Combine these summaries into a single coherent summary that covers all the key aspects of the paper.
+                    Remove any redundancies and ensure the final summary is well-structured.
+                    
+                    Paper Title: ${title}
+                    Authors: ${authors}
+                    Abstract: ${abstract}
+                    
+                    Part Summaries:
+                    ${summaries}
+                    """)
+
+_CONSOLIDATION_SYSTEM_PROMPT = "You are a scientific research assistant tasked with creating a comprehensive analysis of a scientific paper by combining multiple partial summaries. Follow the structure and format specified in the template EXACTLY."
+
+# Metadata placeholders supported in prompt templates, in either {TITLE} or {title} form
+_PLACEHOLDER_RE = re.compile(r"\{(TITLE|AUTHORS|ABSTRACT|DATE|DOI|JOURNAL|title|authors|abstract|date|doi|journal)\}")
+
+# Author list cleanup for names split into single characters (e.g., "D, e, K, o, k, e, r")
+_CHAR_COMMA_RE = re.compile(r'\b[A-Za-z](,\s*[A-Za-z])+\b')
+_SPLIT_CHARS_RE = re.compile(r'([A-Za-z]),\s*([A-Za-z])')
+_DBL_COMMA_RE = re.compile(r'\s*,\s*,\s*')
+_MULTI_SPACE_RE = re.compile(r'\s{2,}')
+
+# Chunks overlap, so their summaries repeat sentences; a sentence whose word set has at least
+# this Jaccard similarity to an earlier one is dropped before consolidation. Sentences shorter
+# than the minimum (mostly section headings) are always kept so the summaries stay structured.
+_DEDUP_JACCARD = 0.75
+_DEDUP_MIN_WORDS = 5
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_WORD_RE = re.compile(r'\w+')
+_LIST_MARKER_RE = re.compile(r'^\s*(?:[-*+]\s+|\d+\.\s+)?')
+
+def _author_name(author: Any) -> str:
+    """Return the name of an author given as a dict with a 'name' key or as a string, or "" if there is none."""
+    if isinstance(author, dict):
+        # Try to get the name from the dictionary
+        return author.get('name', '') or ''
+    if isinstance(author, str) and author.strip():
+        # If it's already a string, use it directly
+        return author
+    return ''
+
+def _model_context_tokens(model: str) -> int:
+    """Return the context window size for a model, falling back to a conservative default."""
+    model = model.lower()
+    if model in _MODEL_CONTEXT_TOKENS:
+        return _MODEL_CONTEXT_TOKENS[model]
+    prefix = max((k for k in _MODEL_CONTEXT_TOKENS if model.startswith(k)), key=len, default=None)
+    return _MODEL_CONTEXT_TOKENS[prefix] if prefix else _DEFAULT_CONTEXT_TOKENS
+
+def _get_encoding(model: str) -> "tiktoken.Encoding":
+    """Get the tiktoken encoding for a model, falling back to cl100k_base for models tiktoken doesn't know (e.g. Claude)."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Fallback to cl100k_base encoding (used by gpt-4, gpt-3.5-turbo, text-embedding-ada-002)
+        return tiktoken.get_encoding("cl100k_base")
+
+def _drop_repeated_sentences(summaries: List[str]) -> List[str]:
+    """
+    Remove sentences that repeat an earlier sentence from a list of chunk summaries.
+    
+    Each line is split into sentences, and a sentence is dropped if its set of words is
+    nearly the same as that of a sentence kept earlier in the same or a previous summary.
+    Line structure (headings, bullets) is preserved and lines left empty are removed.
+    
+    Args:
+        summaries: Chunk summaries in paper order
+        
+    Returns:
+        The summaries with repeated sentences removed
+    """
+    kept_words: List[frozenset] = []
+    result = []
+    
+    for summary in summaries:
+        lines = []
+        for line in summary.split("\n"):
+            # Keep indentation and bullet markers even if the first sentence is dropped
+            marker = _LIST_MARKER_RE.match(line).group()
+            sentences = []
+            for sentence in _SENTENCE_SPLIT_RE.split(line[len(marker):]):
+                words = frozenset(_WORD_RE.findall(sentence.lower()))
+                if len(words) >= _DEDUP_MIN_WORDS:
+                    # Jaccard similarity can only reach the threshold if the sizes are close enough
+                    if any(
+                        len(words & k) >= _DEDUP_JACCARD * len(words | k)
+                        for k in kept_words
+                        if _DEDUP_JACCARD * len(k) <= len(words) <= len(k) / _DEDUP_JACCARD
+                    ):
+                        continue
+                    kept_words.append(words)
+                sentences.append(sentence)
+            if sentences or not line.strip():
+                lines.append(marker + " ".join(sentences))
+        result.append("\n".join(lines))
+    
+    return result
+
+def _drop_references(text: str, in_references: bool) -> Tuple[str, bool]:
+    """
+    Remove reference lists from the text of a page.
+    
+    A reference list runs from a references heading to the next Methods or Supplementary
+    heading, or to the end of the document, so it may start and end on different pages.
+    
+    Args:
+        text: Text of the page
+        in_references: Whether the page starts inside a reference list
+        
+    Returns:
+        Tuple of the text outside reference lists and whether the page ends inside one
+    """
+    kept = []
+    position = 0
+    while True:
+        if in_references:
+            section = _POST_REFERENCES_RE.search(text, position)
+            if not section:
+                break
+            position = section.start()
+            in_references = False
+        else:
+            references = _REFERENCES_RE.search(text, position)
+            if not references:
+                kept.append(text[position:])
+                break
+            kept.append(text[position:references.start()])
+            position = references.end()
+            in_references = True
+    return "\n\n".join(part.strip("\n") for part in kept if part.strip()), in_references
+
+def _error_result(error_message: str) -> Dict[str, str]:
+    """Return the error information reported for a failed summary, classified by its message."""
+    # Check for specific error types
+    if "quota" in error_message.lower() or "limit" in error_message.lower():
+        return {"error": "quota_exceeded", "message": error_message}
+    elif "rate" in error_message.lower():
+        return {"error": "rate_limit", "message": error_message}
+    else:
+        return {"error": "api_error", "message": error_message}
+
 class PaperSummarizer:
     """Class to generate summaries of scientific papers."""
     
     def __init__(self, api_key: Optional[str] = None, custom_prompt_path: Optional[str] = None, 
                  temperature: float = 0.2, model: str = "gpt-3.5-turbo", 
                  api_provider: str = "openai", anthropic_api_key: Optional[str] = None,
-                 max_response_tokens: Optional[int] = None):
+                 max_response_tokens: Optional[int] = None, summary_cache_path: Optional[str] = None,
+                 cache_dir: Optional[str] = None):
         """
         Initialize the paper summarizer.
         
@@ -44,6 +330,8 @@ class PaperSummarizer:
             api_provider: AI provider to use ("openai" or "anthropic")
             anthropic_api_key: Anthropic API key (optional if set in environment)
             max_response_tokens: Maximum number of tokens for model responses (optional, defaults to 3000 for OpenAI and 8000 for Claude)
+            summary_cache_path: Path to a cache file for reusing summaries of near-duplicate papers (optional, OpenAI only)
+            cache_dir: Directory for caching extracted text and summaries of previously processed PDFs (optional)
         """
         # Set the API provider
         self.api_provider = api_provider.lower()
@@ -56,7 +344,9 @@ class PaperSummarizer:
                 raise ValueError("OpenAI API key is required. Set it as OPENAI_API_KEY environment variable or pass it directly.")
                 
             # Initialize OpenAI client
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = OpenAI(api_key=self.api_key, max_retries=_API_MAX_RETRIES)
+            self._complete = self._complete_openai
+            self._complete_batch = self._complete_batch_openai
         elif self.api_provider == "anthropic":
             # Use provided API key or get from environment
             self.anthropic_api_key = anthropic_api_key or os.getenv("ANTHROPIC_API_KEY")
@@ -64,7 +354,9 @@ class PaperSummarizer:
                 raise ValueError("Anthropic API key is required. Set it as ANTHROPIC_API_KEY environment variable or pass it directly.")
                 
             # Initialize Anthropic client
-            self.client = anthropic.Anthropic(api_key=self.anthropic_api_key)
+            self.client = anthropic.Anthropic(api_key=self.anthropic_api_key, max_retries=_API_MAX_RETRIES)
+            self._complete = self._complete_anthropic
+            self._complete_batch = self._complete_batch_anthropic
         else:
             raise ValueError(f"Unsupported API provider: {self.api_provider}. Use 'openai' or 'anthropic'.")
         
@@ -74,9 +366,23 @@ class PaperSummarizer:
         # Set the model to use
         self.model = model
         
+        # Handle for reading this process's memory usage
+        self._process = psutil.Process()
+        
+        # Look up the tokenizer once; it is used for every token count and chunk
+        self._encoding = _get_encoding(self.model)
+        
+        # Anthropic models have no local tokenizer, so their token counts are estimated from length
+        self._is_claude = "claude" in self.model.lower()
+        
+        # The system prompt and context window are the same for every paper, so size them once
+        self._system_prompt = "You are a scientific research assistant tasked with summarizing bioRxiv preprints. Provide clear, concise, and accurate summaries that highlight the key findings, methods, strengths, limitations, and implications of the research."
+        self._system_tokens = self._count_tokens(self._system_prompt)
+        self._model_max_tokens = _model_context_tokens(self.model)
+        
         # Set the maximum response tokens
         if max_response_tokens is None:
-            if "claude" in self.model.lower():
+            if self._is_claude:
                 self.max_response_tokens = 8000
             else:
                 self.max_response_tokens = 3000
@@ -96,13 +402,43 @@ class PaperSummarizer:
             except Exception as e:
                 logger.error(f"Error loading custom prompt: {e}")
                 logger.info("Using default prompt instead.")
+        
+        # The prompt template is the same for every paper, so count its tokens and placeholders once;
+        # only the metadata substituted into it needs to be counted per paper
+        self._prompt_template = self.custom_prompt or _DEFAULT_PROMPT
+        self._prompt_template_tokens = self._count_tokens(self._prompt_template + _METADATA_BLOCK)
+        self._placeholder_counts = Counter(m.group(1).upper() for m in _PLACEHOLDER_RE.finditer(self._prompt_template))
+
+        # Likewise pick the consolidation prompt for chunked papers once
+        self._consolidation_template = _CONSOLIDATION_PROMPT_CUSTOM if self.custom_prompt else _CONSOLIDATION_PROMPT_DEFAULT
+
+        # Summaries depend on the model, sampling settings, prompts and text cleanup as well as the
+        # paper. The prompt contents are hashed rather than whether a custom prompt is used, so
+        # cached summaries are not reused after the default prompts change.
+        self._settings_hash = text_sha256(
+            self.model, str(self.temperature), str(self.max_response_tokens),
+            self._system_prompt, self._prompt_template, self._consolidation_template.template, _TEXT_CLEANUP_VERSION
+        )
+        
+        # Set up the cache of extracted text and summaries keyed by PDF contents, if requested
+        self.disk_cache = DiskCache(cache_dir) if cache_dir else None
+        
+        # Set up the summary cache if requested; it relies on the OpenAI embeddings API
+        self.summary_cache = None
+        if summary_cache_path:
+            if self.api_provider == "openai":
+                self.summary_cache = SemanticSummaryCache(summary_cache_path)
+            else:
+                logger.warning("The summary cache requires OpenAI embeddings and is disabled for other providers")
     
-    def log_memory_usage(self, label: str = ""):
-        """Calculate current memory usage of the process without logging to stdout."""
-        process = psutil.Process()
-        memory_info = process.memory_info()
+    def log_memory_usage(self, label: str = "") -> Optional[float]:
+        """Log current memory usage of the process at debug level, returning it in MB (None when debug logging is off)."""
+        # Reading the memory usage is a system call, so skip it unless it will be logged
+        if not logger.isEnabledFor(logging.DEBUG):
+            return None
+        memory_info = self._process.memory_info()
         memory_mb = memory_info.rss / 1024 / 1024
-        # Memory usage is now only returned, not logged
+        logger.debug(f"Memory usage {label}: {memory_mb:.1f} MB")
         return memory_mb
         
     def num_tokens_from_string(self, string: str, model: str = "gpt-3.5-turbo") -> int:
@@ -113,90 +449,204 @@ class PaperSummarizer:
             return len(string) // 4
         
         # For OpenAI models, use tiktoken
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-            num_tokens = len(encoding.encode(string))
-            return num_tokens
-        except KeyError:
-            # Fallback to cl100k_base encoding (used by gpt-4, gpt-3.5-turbo, text-embedding-ada-002)
-            encoding = tiktoken.get_encoding("cl100k_base")
-            num_tokens = len(encoding.encode(string))
-            return num_tokens
+        encoding = self._encoding if model == self.model else _get_encoding(model)
+        return len(encoding.encode_ordinary(string))
 
-    def extract_text_from_pdf(self, pdf_path: str, max_pages: Optional[int] = None) -> str:
+    def _count_tokens(self, string: str) -> int:
         """
-        Extract text from a PDF file using a file-based approach to minimize memory usage.
+        Returns the number of tokens in a text string for this instance's model.
+        
+        Long strings are encoded in slices that end at whitespace, so only one slice's
+        token list is alive at a time instead of a list of every token in the string.
+        """
+        if self._is_claude:
+            return len(string) // 4
+        
+        encoding = self._encoding
+        if len(string) <= _COUNT_SLICE_CHARS:
+            return len(encoding.encode_ordinary(string))
+        
+        total = 0
+        start = 0
+        while start < len(string):
+            end = start + _COUNT_SLICE_CHARS
+            if end < len(string):
+                # Cut before whitespace so no word is split across slices
+                cut = max(string.rfind(" ", start, end), string.rfind("\n", start, end))
+                if cut > start:
+                    end = cut
+            total += len(encoding.encode_ordinary(string[start:end]))
+            start = end
+        return total
+
+    def num_tokens_from_strings(self, strings: List[str], model: str = "gpt-3.5-turbo") -> List[int]:
+        """Returns the number of tokens in each text string, encoding them in a single batch."""
+        # For Anthropic models, use the same 4 chars per token approximation
+        if "claude" in model.lower():
+            return [len(string) // 4 for string in strings]
+        
+        encoding = self._encoding if model == self.model else _get_encoding(model)
+        return [len(tokens) for tokens in encoding.encode_ordinary_batch(strings)]
+
+    def _tokens_per_char(self, text: str) -> float:
+        """
+        Estimate the tokens per character of a text from a short sample of it.
+        
+        Summaries full of symbols, numbers and non-English names can run well under
+        4 characters per token, so a fixed len(text) / 4 underestimates them.
         
         Args:
-            pdf_path: Path to the PDF file
-            max_pages: Maximum number of pages to extract (None means extract all pages)
+            text: Text to estimate
             
         Returns:
-            Extracted text from the PDF or path to temporary file containing the text
+            Estimated tokens per character, never assuming more than 4 characters per token
         """
-        self.log_memory_usage("Before PDF extraction")
+        sample = text[:_TOKEN_RATIO_SAMPLE_CHARS]
+        if not sample:
+            return 0.25
+        return max(self._count_tokens(sample) / len(sample), 0.25)
+
+    def _iter_pages(self, pdf_path: str, max_pages: Optional[int] = None,
+                    token_budget: Optional[int] = None) -> Iterator[Tuple[str, int]]:
+        """
+        Yield the text of each page of a PDF file as soon as it is extracted.
         
+        Whitespace is collapsed, and running headers, page numbers, line numbers, the
+        affiliations on the first page and the reference list are removed, so none of it is
+        tokenized or sent to the model. Sections after the reference list (such as Methods
+        or Supplementary material) are kept.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            max_pages: Maximum number of pages to extract (None means extract all pages)
+            token_budget: Stop extracting once this many tokens have been read (None means no limit)
+            
+        Yields:
+            Tuple of the text and estimated token count of each page that contains any text
+        """
+        # Opening the document only parses its header; pages are loaded on demand below,
+        # so only the pages we actually read are decoded. An explicit empty password
+        # avoids probing for one.
+        pdf = pdfium.PdfDocument(pdf_path, password="")
         try:
-            # Create a temporary file to store the extracted text
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.txt') as temp:
-                output_file = temp.name
+            num_pages = len(pdf)
+            
+            # Determine pages to process (all pages if max_pages is None)
+            pages_to_process = num_pages if max_pages is None else min(num_pages, max_pages)
+            logger.info(f"Extracting text from PDF: {pages_to_process} pages out of {num_pages} total")
+            
+            total_tokens = 0
             
-            # Open the output file for writing
-            with open(output_file, 'w', encoding='utf-8') as out_file:
-                # Open the PDF file
-                with open(pdf_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
-                    num_pages = len(reader.pages)
+            # Pages inside the reference list are dropped until a following section heading
+            in_references = False
+            reference_pages = 0
+            
+            # Page token counts are estimated from their length, using the characters per token
+            # measured on a sample of each of the first few pages with text, so the remaining
+            # pages are not encoded here
+            sampled_pages = 0
+            sampled_chars = 0
+            sampled_tokens = 0
+            tokens_per_char = 0.25
+            
+            # Use tqdm for a progress bar instead of logging each page
+            # Configure a cleaner, more informative progress bar
+            with tqdm(
+                total=pages_to_process,
+                desc=f"{Fore.GREEN}Extracting PDF text{Style.RESET_ALL}",
+                unit="page",
+                bar_format='{desc}: |{bar:30}| {percentage:3.0f}% | {n_fmt}/{total_fmt} pages',
+                colour='green'
+            ) as pbar:
+                for i in range(0, pages_to_process):
+                    try:
+                        # Load and extract text from this page only
+                        page = pdf[i]
+                        textpage = page.get_textpage()
+                        page_text = textpage.get_text_range()
+                        
+                        # Free the page's native resources immediately
+                        textpage.close()
+                        page.close()
+                    except Exception as e:
+                        logger.error(f"Error extracting text from page {i+1}: {e}")
+                        pbar.update(1)  # Still update the progress bar
+                        continue
                     
-                    # Determine pages to process (all pages if max_pages is None)
-                    pages_to_process = num_pages if max_pages is None else min(num_pages, max_pages)
-                    logger.info(f"Extracting text from PDF: {pages_to_process} pages out of {num_pages} total")
+                    # Update progress bar
+                    pbar.update(1)
                     
-                    # Extract text from each page individually to minimize memory usage
-                    batch_size = 1  # Process 1 page at a time for minimum memory usage
+                    # Normalize whitespace, then drop repeated headers and footers, affiliations
+                    # from the author block, and the reference list
+                    page_text = _LINE_END_RE.sub("\n", page_text)
+                    page_text = _SPACE_RUN_RE.sub(" ", page_text)
+                    page_text = _BLANK_LINES_RE.sub("\n\n", page_text)
+                    page_text = _BOILERPLATE_RE.sub("", page_text)
+                    if i == 0:
+                        page_text = _AFFILIATION_RE.sub("", page_text)
+                    was_in_references = in_references
+                    page_text, in_references = _drop_references(page_text, in_references)
+                    if was_in_references and page_text.strip():
+                        logger.info(f"Skipped {reference_pages} pages of references, resuming at page {i+1}")
+                        reference_pages = 0
+                    if in_references or (was_in_references and not page_text.strip()):
+                        reference_pages += 1
                     
-                    # Use tqdm for a progress bar instead of logging each page
-                    # Configure a cleaner, more informative progress bar
-                    with tqdm(
-                        total=pages_to_process,
-                        desc=f"{Fore.GREEN}Extracting PDF text{Style.RESET_ALL}",
-                        unit="page",
-                        bar_format='{desc}: |{bar:30}| {percentage:3.0f}% | {n_fmt}/{total_fmt} pages',
-                        colour='green'
-                    ) as pbar:
-                        for i in range(0, pages_to_process):
-                            try:
-                                # Extract text from this page
-                                page = reader.pages[i]
-                                page_text = page.extract_text()
-                                
-                                # Write directly to file
-                                if page_text:
-                                    out_file.write(page_text)
-                                    out_file.write("\n\n")
-                                
-                                # Free memory immediately
-                                del page
-                                del page_text
-                                
-                                # Collect garbage to free memory
-                                if i % 5 == 0:  # Every 5 pages
-                                    gc.collect()
-                                    
-                                # Update progress bar
-                                pbar.update(1)
-                                    
-                            except Exception as e:
-                                logger.error(f"Error extracting text from page {i+1}: {e}")
-                                pbar.update(1)  # Still update the progress bar
-                                continue
+                    if page_text.strip():
+                        if sampled_pages < _TOKEN_RATIO_SAMPLE_PAGES:
+                            sample = page_text[:_TOKEN_RATIO_SAMPLE_CHARS]
+                            sampled_pages += 1
+                            sampled_chars += len(sample)
+                            sampled_tokens += self._count_tokens(sample)
+                            tokens_per_char = max(sampled_tokens / sampled_chars, 0.25)
+                        page_tokens = int(len(page_text) * tokens_per_char)
+                        total_tokens += page_tokens
+                        yield page_text, page_tokens
+                    
+                    # Stop early once we have more text than will ever be summarized
+                    if token_budget is not None and total_tokens > token_budget:
+                        logger.info(f"Token budget of {token_budget} reached after {i+1} pages, skipping remaining pages")
+                        break
+                
+                if in_references:
+                    logger.info(f"Skipped {reference_pages} pages of references with no section after them")
+        finally:
+            pdf.close()
+    
+    def extract_text_from_pdf(self, pdf_path: str, max_pages: Optional[int] = None,
+                              token_budget: Optional[int] = None) -> str:
+        """
+        Extract text from a PDF file.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            max_pages: Maximum number of pages to extract (None means extract all pages)
+            token_budget: Stop extracting once this many tokens have been read (None means no limit)
+            
+        Returns:
+            Extracted text from the PDF
+        """
+        self.log_memory_usage("Before PDF extraction")
+        
+        try:
+            # Return the text from an earlier extraction of the same PDF with the same limits
+            text_key = None
+            if self.disk_cache is not None:
+                text_key = text_sha256(file_sha256(pdf_path), str(max_pages), str(token_budget), _TEXT_CLEANUP_VERSION)
+                cached_text = self.disk_cache.get("text", text_key)
+                if cached_text is not None:
+                    logger.info(f"Using cached text for {pdf_path}")
+                    return cached_text
             
-            # Read the extracted text back from the file
-            with open(output_file, 'r', encoding='utf-8') as f:
-                text = f.read()
+            # Collect the pages and join them once at the end
+            parts = []
+            for page_text, _ in self._iter_pages(pdf_path, max_pages=max_pages, token_budget=token_budget):
+                parts.append(page_text)
+                parts.append("\n\n")
+            text = "".join(parts)
             
-            # Clean up the temporary file
-            os.unlink(output_file)
+            if text_key is not None:
+                self.disk_cache.put("text", text_key, text)
             
             self.log_memory_usage("After PDF extraction")
             
@@ -206,162 +656,104 @@ class PaperSummarizer:
             logger.error(f"Error extracting text from PDF: {e}")
             return ""
     
-    def chunk_text(self, text: str, max_chunk_tokens: int, overlap_tokens: int = 100) -> List[str]:
+    def _pack_paragraphs(self, paragraph_batches: Iterable[List[str]], max_chunk_tokens: int,
+                         overlap_tokens: int = 100) -> Iterator[Tuple[str, int]]:
         """
-        Split text into chunks that fit within token limits.
+        Greedily pack paragraphs into chunks that fit within token limits.
+        
+        Each paragraph is encoded once and packed using its token count, so chunk
+        boundaries never split a sentence or a token. Consecutive chunks share trailing
+        paragraphs worth at least ``overlap_tokens``. Paragraphs arrive in batches (e.g.
+        one per page) that are each encoded in a single call; batches are consumed lazily,
+        so chunks are yielded while later batches are still being produced.
         
         Args:
-            text: The text to split into chunks
+            paragraph_batches: Lists of paragraphs to pack, in order
             max_chunk_tokens: Maximum tokens per chunk
             overlap_tokens: Number of tokens to overlap between chunks
             
-        Returns:
-            List of text chunks
+        Yields:
+            Tuple of the text and token count of each chunk
         """
-        self.log_memory_usage("before chunking")
-        
-        # Use an extremely small segment size to minimize memory usage
-        segment_size = 2000  # characters per segment (extremely small to prevent memory spikes)
-        
         # If max_chunk_tokens is negative, set a reasonable default
         if max_chunk_tokens <= 0:
             logger.warning(f"Invalid max_chunk_tokens: {max_chunk_tokens}, setting to 2000")
             max_chunk_tokens = 2000
         
-        # Estimate total tokens based on character count first to avoid memory spike
-        estimated_tokens = len(text) / 4  # Rough estimate: ~4 chars per token
-        logger.info(f"Estimated tokens in text: ~{estimated_tokens:.0f} (based on character count)")
-        
-        # Check if we need to chunk at all
-        if len(text) < max_chunk_tokens * 3:  # Using a conservative estimate
-            # Create a temporary file to store the text
-            temp_fd, temp_file = tempfile.mkstemp(suffix='.txt')
-            try:
-                with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                
-                # Free the original text from memory
-                del text
-                gc.collect()
-                
-                # Now read the file in small chunks to check token count
-                with open(temp_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                # Use our token counting method instead of direct tiktoken
-                actual_tokens = self.num_tokens_from_string(content, self.model)
-                
-                if actual_tokens <= max_chunk_tokens:
-                    logger.info(f"Text fits in one chunk ({actual_tokens} tokens)")
-                    return [content]  # No chunking needed
-                    
-                # If we get here, we need to chunk after all
-                del content
-                gc.collect()
-                
-            except Exception as e:
-                logger.error(f"Error checking if chunking is needed: {e}")
-            finally:
-                # Clean up the temporary file
-                try:
-                    os.unlink(temp_file)
-                except Exception as e:
-                    logger.error(f"Error removing temporary file: {e}")
-        
-        # If we get here, we need to chunk the text
-        logger.info("Proceeding with text chunking")
+        encoding = self._encoding
         
-        # Create a temporary directory to store chunks
-        chunk_dir = tempfile.mkdtemp(prefix="biorxiv_text_chunks_")
-        logger.info(f"Created temporary directory for text chunks: {chunk_dir}")
+        current = []  # (paragraph, token count) pairs in the chunk being built
+        current_size = 0
         
-        # Process text in tiny segments to minimize memory usage
-        chunk_files = []
-        current_chunk = ""
-        current_chunk_size = 0
-        chunk_count = 0
+        def encoded():
+            # Encode each batch of paragraphs in one call, which tiktoken spreads across threads
+            for paragraphs in paragraph_batches:
+                batch = [paragraph for paragraph in paragraphs if paragraph.strip()]
+                yield from zip(batch, encoding.encode_ordinary_batch(batch))
         
-        try:
-            # Initialize encoding
-            encoding = tiktoken.encoding_for_model(self.model)
+        for paragraph, tokens in encoded():
+            size = len(tokens)
             
-            # Process text in very small segments
-            for i in range(0, len(text), segment_size):
-                # Log progress periodically
-                if i % (segment_size * 10) == 0:
-                    logger.info(f"Chunking progress: {i}/{len(text)} characters processed ({i/len(text)*100:.1f}%)")
-                    self.log_memory_usage(f"during chunking at position {i}")
-                
-                # Get the current segment
-                segment = text[i:i+segment_size]
-                
-                # Encode this segment to get token count
-                segment_tokens = encoding.encode(segment)
-                
-                # Check if adding this segment would exceed the chunk size
-                if current_chunk_size + len(segment_tokens) > max_chunk_tokens:
-                    # Save the current chunk to a file
-                    if current_chunk:
-                        chunk_count += 1
-                        chunk_file = os.path.join(chunk_dir, f"chunk_{chunk_count}.txt")
-                        with open(chunk_file, 'w', encoding='utf-8') as f:
-                            f.write(current_chunk)
-                        chunk_files.append(chunk_file)
-                        
-                        # Reset current chunk
-                        del current_chunk
-                        current_chunk = ""
-                        current_chunk_size = 0
-                        gc.collect()
-                
-                # Add this segment to the current chunk
-                current_chunk += segment
-                current_chunk_size += len(segment_tokens)
+            if size > max_chunk_tokens:
+                # A single paragraph larger than a chunk: flush and split it on token boundaries
+                if current:
+                    yield "\n\n".join(p for p, _ in current), current_size
+                for start in range(0, len(tokens), max_chunk_tokens):
+                    piece = tokens[start:start + max_chunk_tokens]
+                    yield encoding.decode(piece), len(piece)
+                current, current_size = [], 0
+                continue
+            
+            if current and current_size + size > max_chunk_tokens:
+                yield "\n\n".join(p for p, _ in current), current_size
                 
-                # Free memory
-                del segment
-                del segment_tokens
-                gc.collect()
+                # Start the next chunk with trailing paragraphs covering the overlap
+                carry = []
+                carry_size = 0
+                for prev in reversed(current):
+                    if carry_size >= overlap_tokens:
+                        break
+                    carry.insert(0, prev)
+                    carry_size += prev[1]
+                while carry and carry_size + size > max_chunk_tokens:
+                    carry_size -= carry.pop(0)[1]
+                current, current_size = carry, carry_size
             
-            # Save the last chunk if there's anything left
-            if current_chunk:
-                chunk_count += 1
-                chunk_file = os.path.join(chunk_dir, f"chunk_{chunk_count}.txt")
-                with open(chunk_file, 'w', encoding='utf-8') as f:
-                    f.write(current_chunk)
-                chunk_files.append(chunk_file)
+            current.append((paragraph, size))
+            current_size += size
+        
+        # Emit the last chunk if there's anything left
+        if current:
+            yield "\n\n".join(p for p, _ in current), current_size
+    
+    def chunk_text(self, text: str, max_chunk_tokens: int, overlap_tokens: int = 100) -> List[str]:
+        """
+        Split text into chunks that fit within token limits.
+        
+        Paragraphs (separated by blank lines) are packed greedily into chunks using
+        their token counts, so chunk boundaries never split a sentence or a token.
+        Consecutive chunks share trailing paragraphs worth at least ``overlap_tokens``.
+        
+        Args:
+            text: The text to split into chunks
+            max_chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Number of tokens to overlap between chunks
             
-            # Free the original text from memory completely
-            del text
-            del current_chunk
-            gc.collect()
+        Returns:
+            List of text chunks
+        """
+        self.log_memory_usage("before chunking")
+        
+        try:
+            chunks = [chunk for chunk, _ in self._pack_paragraphs([text.split("\n\n")], max_chunk_tokens, overlap_tokens)]
             
-            # Now read the chunks back from files
-            chunks = []
-            for file_path in chunk_files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        chunk_content = f.read()
-                        chunks.append(chunk_content)
-                except Exception as e:
-                    logger.error(f"Error reading chunk file {file_path}: {e}")
+            if len(chunks) <= 1:
+                logger.info("Text fits in one chunk")
+                return [text]  # No chunking needed
             
             logger.info(f"Split text into {len(chunks)} chunks")
             self.log_memory_usage("after chunking")
             
-            # Clean up temporary files
-            for file_path in chunk_files:
-                try:
-                    os.unlink(file_path)
-                except Exception as e:
-                    logger.error(f"Error removing chunk file {file_path}: {e}")
-            
-            try:
-                os.rmdir(chunk_dir)
-                logger.info(f"Removed temporary chunk directory: {chunk_dir}")
-            except Exception as e:
-                logger.error(f"Error removing temporary chunk directory: {e}")
-            
             return chunks
             
         except Exception as e:
@@ -369,6 +761,36 @@ class PaperSummarizer:
             # Return an empty list in case of error
             return []
 
+    @staticmethod
+    def _chunk_request(index: int, chunk_tokens: int) -> Tuple[str, int]:
+        """
+        Return the instructions and response token limit for summarizing a chunk.
+        
+        Args:
+            index: Position of the chunk in the paper, starting at 0
+            chunk_tokens: Token count of the chunk
+            
+        Returns:
+            Tuple of the note prefixed to the chunk and the maximum tokens for its summary
+        """
+        max_tokens = min(_CHUNK_SUMMARY_MAX_TOKENS, max(_CHUNK_SUMMARY_MIN_TOKENS, chunk_tokens // 4))
+        
+        # Ask for somewhat fewer words than the token limit allows, so summaries end on their
+        # own instead of being cut off
+        max_words = int(max_tokens * 0.6)
+        note = f"Note: This is part {index+1} of the paper. Summarize it in at most {max_words} words, without preamble."
+        return note, max_tokens
+    
+    def _chunk_key(self, chunk: str, max_tokens: int) -> str:
+        """
+        Return the disk cache key of a chunk summary.
+        
+        The key covers the chunk text, the settings and the prompt template, but not the paper's
+        metadata or the chunk's position, so an unchanged chunk of a new version of the paper (which
+        has a new DOI and date) is still found in the cache.
+        """
+        return text_sha256(self._settings_hash, self._system_prompt, chunk, str(max_tokens))
+    
     def generate_summary_for_chunk(self, chunk: str, system_prompt: str, user_prompt_prefix: str, max_tokens: int = 1000) -> str:
         """
         Generate a summary for a single chunk of text.
@@ -386,55 +808,25 @@ class PaperSummarizer:
             # Construct the full user prompt
             user_prompt = f"{user_prompt_prefix}\n\nFull Text:\n{chunk}"
             
-            # Log that we're making an API call
-            logger.info(f"Sending request to {self.api_provider} API...")
+            # Reuse the summary of an identical chunk from an earlier run, such as a rerun after
+            # a failed consolidation or another version of the paper with unchanged sections
+            chunk_key = None
+            if self.disk_cache is not None:
+                chunk_key = self._chunk_key(chunk, max_tokens)
+                cached_summary = self.disk_cache.get("chunks", chunk_key)
+                if cached_summary is not None:
+                    logger.info("Using cached chunk summary")
+                    return cached_summary
             
-            # Create a stop event for the spinner
-            stop_event = threading.Event()
+            # Chunks are summarized concurrently, so report progress through the log rather than
+            # a console spinner per request
+            logger.info(f"Sending chunk request to {self.api_provider} API...")
             
-            # Start the spinner animation in a separate thread
-            spinner_thread = threading.Thread(
-                target=self.spinner_animation, 
-                args=(stop_event, f"Generating summary for chunk...")
-            )
-            spinner_thread.daemon = True
-            spinner_thread.start()
+            # Make the API call
+            summary = self._complete(system_prompt, user_prompt, max_tokens)
             
-            try:
-                # Make the API call
-                if self.api_provider == "openai":
-                    response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        temperature=self.temperature,
-                        max_tokens=max_tokens,
-                    )
-                    
-                    summary = response.choices[0].message.content
-                    
-                elif self.api_provider == "anthropic":
-                    message = self.client.messages.create(
-                        model=self.model,
-                        max_tokens=max_tokens,
-                        temperature=self.temperature,
-                        system=system_prompt,
-                        messages=[
-                            {"role": "user", "content": user_prompt}
-                        ]
-                    )
-                    
-                    summary = message.content[0].text
-                    
-                else:
-                    raise ValueError(f"Unsupported API provider: {self.api_provider}")
-            finally:
-                # Stop the spinner animation
-                stop_event.set()
-                spinner_thread.join(timeout=1.0)
-                print(f"\r{Fore.GREEN}Chunk summary generation complete!{Style.RESET_ALL}")
+            if chunk_key is not None and summary:
+                self.disk_cache.put("chunks", chunk_key, summary)
             
             return summary
             
@@ -455,25 +847,18 @@ class PaperSummarizer:
                 logger.error(f"Error generating summary for chunk: {e}")
                 return f"Error generating summary: {error_message}"
 
-    def generate_summary(self, pdf_path: str, paper_metadata: Dict[str, Any], max_pdf_pages: Optional[int] = None) -> Union[str, Dict[str, str]]:
+    def _prepare_paper(self, paper_metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Generate a comprehensive summary of a scientific paper.
+        Format a paper's metadata and fill it into the prompt template.
         
         Args:
-            pdf_path: Path to the PDF file
             paper_metadata: Metadata about the paper
-            max_pdf_pages: Maximum number of pages to extract from the PDF (None means all pages)
             
         Returns:
-            Generated summary of the paper or error information
+            Dictionary with the formatted metadata ('title', 'authors_text', 'abstract',
+            'pub_date', 'doi'), the filled-in 'prompt', the 'user_prompt_prefix' sent ahead
+            of the paper text, and 'max_chunk_tokens', the tokens left for the paper text
         """
-        # Extract text from PDF
-        paper_text = self.extract_text_from_pdf(pdf_path, max_pages=max_pdf_pages)
-        
-        if not paper_text:
-            logger.error("Failed to extract text from PDF")
-            return {"error": "extraction_failed", "message": "Failed to extract text from PDF"}
-        
         # Prepare paper metadata for the prompt
         title = paper_metadata.get('title', 'Unknown Title')
         authors = paper_metadata.get('authors', [])
@@ -483,16 +868,7 @@ class PaperSummarizer:
         
         # First try to extract from the authors list
         if isinstance(authors, list):
-            for author in authors:
-                if isinstance(author, dict):
-                    # Try to get the name from the dictionary
-                    author_name = author.get('name', '')
-                    if author_name:
-                        author_names.append(author_name)
-                elif isinstance(author, str):
-                    # If it's already a string, use it directly
-                    if len(author.strip()) > 0:
-                        author_names.append(author)
+            author_names = [name for name in map(_author_name, authors) if name]
         elif isinstance(authors, str):
             # If authors is already a string, use it directly
             authors_text = authors
@@ -510,13 +886,13 @@ class PaperSummarizer:
         
         # Clean up common formatting issues
         # Fix individual characters separated by commas (e.g., "D, e, K, o, k, e, r")
-        if re.search(r'\b[A-Za-z](,\s*[A-Za-z])+\b', authors_text):
+        if _CHAR_COMMA_RE.search(authors_text):
             logger.warning("Detected possible character-by-character author formatting, attempting to fix")
             # Remove commas between single characters
-            authors_text = re.sub(r'([A-Za-z]),\s*([A-Za-z])', r'\1\2', authors_text)
+            authors_text = _SPLIT_CHARS_RE.sub(r'\1\2', authors_text)
             # Clean up any remaining odd patterns
-            authors_text = re.sub(r'\s*,\s*,\s*', ', ', authors_text)
-            authors_text = re.sub(r'\s{2,}', ' ', authors_text)
+            authors_text = _DBL_COMMA_RE.sub(', ', authors_text)
+            authors_text = _MULTI_SPACE_RE.sub(' ', authors_text)
         
         # Log the author formatting for debugging
         logger.info(f"Formatted authors: {authors_text}")
@@ -536,57 +912,22 @@ class PaperSummarizer:
         # Handle the case where doi might be None
         safe_doi = doi if doi is not None else "No DOI available"
         
-        # Construct the prompt
-        if self.custom_prompt:
-            # Use custom prompt if provided
-            prompt = self.custom_prompt
-        else:
-            # Default prompt based on scientific_paper_prompt.md
-            prompt = """
-            # Expert Analysis: {TITLE}
-
-            You are a senior scientific researcher with decades of experience as a principal investigator, journal editor, and study section reviewer in biology/bioinformatics. Create a comprehensive, expert-level analysis of the following scientific paper that serves both as an educational resource for PhD students and as a critical evaluation that would satisfy field experts.
-
-            ## 1. Paper Context and Significance
-            - **Research Domain:** [Identify the precise subfield classification]
-            - **Scientific Question:** [Identify the specific scientific gap or question being addressed]
-            - **Background Context:** [Provide brief historical context of this research question]
-            - **Key Technologies/Methods:** [Describe core methodological approaches with technical specificity]
-
-            ## 2. Accessible Summary for Early-Career Researchers
-            [Provide a 3-4 paragraph explanation of the core research, written for a first-year PhD student. Balance accessibility with scientific precision. Define specialized terminology when first used. Highlight what makes this work novel or important in the broader context of the field.]
-
-            ## 3. Key Findings and Contributions
-            - **Primary Findings:** [List the most important results with quantitative details where relevant]
-            - **Methodological Innovations:** [Describe any novel methods or techniques introduced]
-            - **Conceptual Advances:** [Explain theoretical or conceptual contributions]
-            - **Resource Generation:** [Note any datasets, tools, or resources produced]
-
-            ## 4. Critical Analysis
-            - **Strengths:** [Identify the major strengths of the paper]
-            - **Limitations:** [Discuss methodological limitations, interpretative issues, or gaps]
-            - **Alternative Interpretations:** [Consider alternative explanations for the findings]
-            - **Unanswered Questions:** [Identify important questions left unaddressed]
-
-            ## 5. Impact and Future Directions
-            - **Field Impact:** [Assess how this work advances the field]
-            - **Broader Implications:** [Consider implications beyond the immediate research area]
-            - **Follow-up Studies:** [Suggest logical next steps for this research]
-            - **Technical Improvements:** [Recommend methodological refinements]
-
-            Format your analysis in Markdown with clear headings and bullet points where appropriate.
-            """
-        
-        # Replace placeholders in the prompt - handle both formats {TITLE} and {title}
-        prompt = prompt.replace("{TITLE}", title).replace("{title}", title)
-        prompt = prompt.replace("{AUTHORS}", authors_text).replace("{authors}", authors_text)
-        prompt = prompt.replace("{ABSTRACT}", abstract).replace("{abstract}", abstract)
-        prompt = prompt.replace("{DATE}", safe_pub_date).replace("{date}", safe_pub_date)
-        prompt = prompt.replace("{DOI}", safe_doi).replace("{doi}", safe_doi)
+        # Construct the prompt from the custom prompt if provided, otherwise the default
+        prompt = self._prompt_template
         
-        # Add additional placeholders that might be in the scientific_paper_prompt.md
+        # Additional placeholder that might be in the scientific_paper_prompt.md
         journal = paper_metadata.get('journal', 'bioRxiv (Preprint)')
-        prompt = prompt.replace("{JOURNAL}", journal).replace("{journal}", journal)
+        
+        # Replace placeholders in the prompt in a single pass - handle both formats {TITLE} and {title}
+        placeholder_values = {
+            "TITLE": title,
+            "AUTHORS": authors_text,
+            "ABSTRACT": abstract,
+            "DATE": safe_pub_date,
+            "DOI": safe_doi,
+            "JOURNAL": journal,
+        }
+        prompt = _PLACEHOLDER_RE.sub(lambda m: placeholder_values[m.group(1).upper()], prompt)
         
         # Handle paper_text placeholder
         if "{paper_text}" in prompt:
@@ -595,31 +936,23 @@ class PaperSummarizer:
         # Log that the prompt has been prepared
         logger.info(f"Prompt prepared with paper metadata (title, authors, etc.)")
         
-        # System prompt for all API calls
-        system_prompt = "You are a scientific research assistant tasked with summarizing bioRxiv preprints. Provide clear, concise, and accurate summaries that highlight the key findings, methods, strengths, limitations, and implications of the research."
-        
         # User prompt prefix (metadata and instructions)
         user_prompt_prefix = f"{prompt}\n\nPaper Metadata:\nTitle: {title}\nAuthors: {authors_text}\nDate: {safe_pub_date}\nDOI: {safe_doi}\n\nAbstract:\n{abstract}"
         
-        # Calculate token counts
-        system_tokens = self.num_tokens_from_string(system_prompt, self.model)
-        prefix_tokens = self.num_tokens_from_string(user_prompt_prefix, self.model)
+        # Calculate token counts; the prefix is the pre-counted template plus each metadata value
+        # once per placeholder, and once more in the metadata block (except the journal)
+        system_tokens = self._system_tokens
+        metadata_tokens = self.num_tokens_from_strings(list(placeholder_values.values()), self.model)
+        prefix_tokens = self._prompt_template_tokens + sum(
+            tokens * (self._placeholder_counts[field] + (field != "JOURNAL"))
+            for field, tokens in zip(placeholder_values, metadata_tokens)
+        )
         
         # Add overhead tokens for formatting
         overhead_tokens = 100
         
         # Calculate maximum tokens available for the paper text
-        # For Claude models, use a much higher token limit
-        if "claude" in self.model.lower():
-            model_max_tokens = 100000  # Claude models have very high token limits
-            logger.info(f"Using Claude model with high token limit: {model_max_tokens}")
-        else:
-            # For OpenAI models, use appropriate limits
-            model_max_tokens = 16000 if "gpt-4" in self.model else 4000  # Adjust based on the model
-            if "32k" in self.model:
-                model_max_tokens = 32000
-            elif "16k" in self.model:
-                model_max_tokens = 16000
+        model_max_tokens = self._model_max_tokens
         
         max_chunk_tokens = model_max_tokens - system_tokens - prefix_tokens - self.max_response_tokens - overhead_tokens
         
@@ -628,436 +961,856 @@ class PaperSummarizer:
         logger.info(f"User prefix tokens: {prefix_tokens}")
         logger.info(f"Available tokens for paper text: {max_chunk_tokens}")
         
-        # Estimate token count based on character count first to avoid memory spike
-        estimated_tokens = len(paper_text) / 4  # Rough estimate: ~4 chars per token
-        logger.info(f"Estimated paper text tokens: ~{estimated_tokens:.0f} (based on character count)")
         
-        # Log the API call
-        logger.info(f"{Fore.BLUE}Generating summary using {self.api_provider} model: {self.model}{Style.RESET_ALL}")
+        return {
+            "title": title,
+            "authors_text": authors_text,
+            "abstract": abstract,
+            "pub_date": safe_pub_date,
+            "doi": safe_doi,
+            "prompt": prompt,
+            "user_prompt_prefix": user_prompt_prefix,
+            "max_chunk_tokens": max_chunk_tokens,
+        }
+    
+    def _summary_key(self, pdf_path: str, max_pdf_pages: Optional[int]) -> Optional[str]:
+        """Return the disk cache key of a PDF's summary, or None if there is no cache or the PDF can't be read."""
+        if self.disk_cache is None:
+            return None
+        try:
+            return text_sha256(file_sha256(pdf_path), self._settings_hash, str(max_pdf_pages))
+        except OSError as e:
+            logger.warning(f"Could not hash PDF for the cache: {e}")
+            return None
+    
+    def _read_leading_pages(self, pdf_path: str, max_pdf_pages: Optional[int],
+                            max_chunk_tokens: int) -> Tuple[List[str], Iterator[Tuple[str, int]], int]:
+        """
+        Read only as many pages as it takes to know whether a paper fits in a single request.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            max_pdf_pages: Maximum number of pages to extract from the PDF (None means all pages)
+            max_chunk_tokens: Tokens available for the paper text in a single request
+            
+        Returns:
+            Tuple of the text of the pages read (empty if extraction failed), an iterator over
+            the remaining pages, and the token count of the pages read
+        """
+        # Extract text from PDF page by page, stopping once well past what the chunked path can use
+        token_budget = max_chunk_tokens * _EXTRACTION_BUDGET_FACTOR if max_chunk_tokens > 0 else None
+        pages = self._iter_pages(pdf_path, max_pages=max_pdf_pages, token_budget=token_budget)
         
+        leading_pages = []
+        estimated_tokens = 0
         try:
-            # Always calculate exact token count before deciding to chunk
-            paper_tokens = self.num_tokens_from_string(paper_text, self.model)
-            logger.info(f"Actual paper text tokens: {paper_tokens}")
+            # Pages arrive with estimated token counts; keep reading until the paper is clearly too long
+            for page_text, page_tokens in pages:
+                leading_pages.append(page_text)
+                estimated_tokens += page_tokens
+                if estimated_tokens > max_chunk_tokens * _TOKEN_ESTIMATE_SLACK:
+                    break
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {e}")
+            return [], iter(()), 0
+        
+        # A paper clearly over the limit is chunked on its estimate (the chunks are counted
+        # exactly as they are packed); any paper that may go out in a single request is encoded
+        # first, so an underestimate never produces a request over the context window
+        if leading_pages and estimated_tokens <= max_chunk_tokens * _TOKEN_ESTIMATE_SLACK:
+            paper_tokens = self._count_tokens("\n\n".join(leading_pages))
+            logger.debug(f"Estimated {estimated_tokens} paper tokens, counted {paper_tokens} exactly")
+        else:
+            paper_tokens = estimated_tokens
+            logger.debug(f"Using estimated paper tokens: {estimated_tokens}")
+        
+        return leading_pages, pages, paper_tokens
+    
+    @staticmethod
+    def _chunk_system_prompt(system_prompt: str, user_prompt_prefix: str) -> str:
+        """
+        Build the system prompt shared by all chunks of a paper.
+        
+        The prompt and paper metadata are the same for every chunk, so they are sent once as
+        system context and only the chunk itself goes in the user message.
+        """
+        if "{paper_text}" in user_prompt_prefix:
+            chunk_context = user_prompt_prefix.replace("{paper_text}", "[The text of this part of the paper is provided in the user message]")
+        else:
+            chunk_context = user_prompt_prefix
+        return f"{system_prompt}\n\n{chunk_context}"
+    
+    def _consolidation_prompt(self, paper: Dict[str, Any], chunk_summaries: List[str]) -> str:
+        """
+        Build the prompt that consolidates a paper's chunk summaries into the final summary.
+        
+        Repeated sentences are removed, the summaries are merged pairwise until they fit the
+        consolidation budget, and anything still too long is truncated.
+        
+        Args:
+            paper: Prepared paper, as returned by _prepare_paper
+            chunk_summaries: Chunk summaries in paper order
             
-            # For Claude models, we can often skip chunking due to high token limits
-            if "claude" in self.model.lower() and paper_tokens <= max_chunk_tokens:
-                logger.info(f"Using Claude model with sufficient token limit, skipping chunking")
-                
-                # Create a stop event for the spinner
-                stop_event = threading.Event()
+        Returns:
+            The consolidation prompt
+        """
+        # Overlapping chunks produce overlapping summaries; drop the repeats so they
+        # don't inflate the merge and consolidation prompts
+        before_chars = sum(len(c) for c in chunk_summaries)
+        chunk_summaries = _drop_repeated_sentences(chunk_summaries)
+        logger.info(f"Removed repeated sentences from chunk summaries ({before_chars} -> {sum(len(c) for c in chunk_summaries)} characters)")
+        
+        # Merge partial summaries pairwise until they fit in a single consolidation call
+        max_combined_tokens = 12000  # Maximum tokens for combined summaries
+        chunk_summaries = asyncio.run(self._reduce_summaries(chunk_summaries, paper["title"], max_combined_tokens))
+        combined_summaries = "\n\n".join(chunk_summaries) + "\n\n"
+        del chunk_summaries
+        
+        # Check if combined summaries is too large using character count rather than encoding
+        # the entire text, with the characters per token measured on a short sample
+        tokens_per_char = self._tokens_per_char(combined_summaries)
+        estimated_tokens = len(combined_summaries) * tokens_per_char
+        
+        # If it's likely to be too large based on the estimate, truncate it, leaving a
+        # 5% margin in case the sample is not representative
+        max_combined_chars = int(max_combined_tokens / tokens_per_char * _TOKEN_ESTIMATE_MARGIN)
+        
+        if len(combined_summaries) > max_combined_chars:
+            logger.warning(f"Combined summaries likely too large (~{estimated_tokens:.0f} estimated tokens), truncating")
+            
+            # Truncate by preserving beginning and end based on character count
+            first_part_size = int(max_combined_chars * 0.6)
+            last_part_size = max_combined_chars - first_part_size
+            
+            first_part = combined_summaries[:first_part_size]
+            last_part = combined_summaries[-last_part_size:]
+            
+            combined_summaries = first_part + "\n\n[...additional content omitted for length...]\n\n" + last_part
+        else:
+            logger.info(f"Estimated combined summaries tokens: ~{estimated_tokens:.0f}")
+        
+        # Use a consolidation prompt that preserves the original custom prompt structure
+        return self._consolidation_template.substitute(
+            title=paper["title"],
+            authors=paper["authors_text"],
+            doi=paper["doi"],
+            date=paper["pub_date"],
+            abstract=paper["abstract"],
+            summaries=combined_summaries,
+            prompt=paper["prompt"]
+        )
+    
+    def _cache_summary(self, summary: str, summary_key: Optional[str], paper_embedding: Optional[List[float]]):
+        """Cache a summary body; the metadata header is rebuilt for each paper."""
+        if paper_embedding is not None:
+            self.summary_cache.add(self._settings_hash, paper_embedding, summary)
+        if summary_key is not None:
+            self.disk_cache.put("summaries", summary_key, summary)
+    
+    def generate_summary(self, pdf_path: str, paper_metadata: Dict[str, Any], max_pdf_pages: Optional[int] = None,
+                         on_token: Optional[Callable[[str], None]] = None) -> Union[str, Dict[str, str]]:
+        """
+        Generate a comprehensive summary of a scientific paper.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            paper_metadata: Metadata about the paper
+            max_pdf_pages: Maximum number of pages to extract from the PDF (None means all pages)
+            on_token: Callback receiving the final summary text as it is streamed (optional)
+            
+        Returns:
+            Generated summary of the paper or error information
+        """
+        paper = self._prepare_paper(paper_metadata)
+        title = paper["title"]
+        authors_text = paper["authors_text"]
+        abstract = paper["abstract"]
+        safe_pub_date = paper["pub_date"]
+        safe_doi = paper["doi"]
+        user_prompt_prefix = paper["user_prompt_prefix"]
+        max_chunk_tokens = paper["max_chunk_tokens"]
+        
+        # System prompt for all API calls
+        system_prompt = self._system_prompt
+        
+        # Return the summary from an earlier run on the same PDF with the same settings
+        summary_key = self._summary_key(pdf_path, max_pdf_pages)
+        if summary_key is not None:
+            cached_summary = self.disk_cache.get("summaries", summary_key)
+            if cached_summary is not None:
+                logger.info(f"{Fore.GREEN}Using cached summary from a previous run{Style.RESET_ALL}")
+                if on_token is not None:
+                    on_token(cached_summary)
+                return self._with_metadata_header(cached_summary, title, authors_text, safe_pub_date, safe_doi, abstract)
+        
+        # Only read as many pages as it takes to know whether the paper fits in a single request
+        leading_pages, pages, paper_tokens = self._read_leading_pages(pdf_path, max_pdf_pages, max_chunk_tokens)
+        
+        if not leading_pages:
+            logger.error("Failed to extract text from PDF")
+            return {"error": "extraction_failed", "message": "Failed to extract text from PDF"}
+        
+        paper_text = "\n\n".join(leading_pages)
+        
+        # Reuse the summary of a near-duplicate paper (such as an earlier version) if one is cached
+        summary = None
+        paper_embedding = None
+        if self.summary_cache is not None:
+            paper_embedding = self._embed_paper(paper_text)
+            if paper_embedding is not None:
+                summary = self.summary_cache.lookup(self._settings_hash, paper_embedding)
+        cached = summary is not None
+        
+        # Log the API call
+        if not cached:
+            logger.info(f"{Fore.BLUE}Generating summary using {self.api_provider} model: {self.model}{Style.RESET_ALL}")
+        
+        try:
+            if cached:
+                logger.info(f"{Fore.GREEN}Using cached summary of a near-duplicate paper{Style.RESET_ALL}")
+                if on_token is not None:
+                    on_token(summary)
                 
-                # Start the spinner animation in a separate thread
-                spinner_thread = threading.Thread(
-                    target=self.spinner_animation, 
-                    args=(stop_event, f"Generating summary with {self.model}...")
+            elif paper_tokens <= max_chunk_tokens and on_token is not None:
+                # Paper fits within token limits - stream the summary to the caller as it is generated
+                summary = self._stream_completion(
+                    system_prompt,
+                    f"{user_prompt_prefix}\n\nFull Text:\n{paper_text}",
+                    self.max_response_tokens,
+                    on_token
                 )
-                spinner_thread.daemon = True
-                spinner_thread.start()
                 
-                try:
-                    # Make the API call
-                    message = self.client.messages.create(
-                        model=self.model,
-                        max_tokens=self.max_response_tokens,
-                        temperature=self.temperature,
-                        system=system_prompt,
-                        messages=[
-                            {"role": "user", "content": f"{user_prompt_prefix}\n\nFull Text:\n{paper_text}"}
-                        ]
-                    )
-                    
-                    summary = message.content[0].text
-                finally:
-                    # Stop the spinner animation
-                    stop_event.set()
-                    spinner_thread.join(timeout=1.0)
-                    print(f"\r{Fore.GREEN}Summary generation complete!{Style.RESET_ALL}")
-                    
             elif paper_tokens <= max_chunk_tokens:
-                # Process normally - paper fits within token limits
-                if self.api_provider == "openai":
-                    # Create a stop event for the spinner
-                    stop_event = threading.Event()
-                    
-                    # Start the spinner animation in a separate thread
-                    spinner_thread = threading.Thread(
-                        target=self.spinner_animation, 
-                        args=(stop_event, f"Generating summary with {self.model}...")
-                    )
-                    spinner_thread.daemon = True
-                    spinner_thread.start()
-                    
-                    try:
-                        # Make the API call
-                        response = self.client.chat.completions.create(
-                            model=self.model,
-                            messages=[
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": f"{user_prompt_prefix}\n\nFull Text:\n{paper_text}"}
-                            ],
-                            temperature=self.temperature,
-                            max_tokens=self.max_response_tokens,
-                        )
-                        
-                        summary = response.choices[0].message.content
-                    finally:
-                        # Stop the spinner animation
-                        stop_event.set()
-                        spinner_thread.join(timeout=1.0)
-                        print(f"\r{Fore.GREEN}Summary generation complete!{Style.RESET_ALL}")
-                        
-                elif self.api_provider == "anthropic":
-                    # Create a stop event for the spinner
-                    stop_event = threading.Event()
-                    
-                    # Start the spinner animation in a separate thread
-                    spinner_thread = threading.Thread(
-                        target=self.spinner_animation, 
-                        args=(stop_event, f"Generating summary with {self.model}...")
-                    )
-                    spinner_thread.daemon = True
-                    spinner_thread.start()
-                    
-                    try:
-                        # Make the API call
-                        message = self.client.messages.create(
-                            model=self.model,
-                            max_tokens=self.max_response_tokens,
-                            temperature=self.temperature,
-                            system=system_prompt,
-                            messages=[
-                                {"role": "user", "content": f"{user_prompt_prefix}\n\nFull Text:\n{paper_text}"}
-                            ]
-                        )
-                        
-                        summary = message.content[0].text
-                    finally:
-                        # Stop the spinner animation
-                        stop_event.set()
-                        spinner_thread.join(timeout=1.0)
-                        print(f"\r{Fore.GREEN}Summary generation complete!{Style.RESET_ALL}")
+                # Paper fits within token limits (most papers do for Claude and 128k models) - no chunking needed
+                logger.info(f"Paper fits in a single request ({paper_tokens} of {max_chunk_tokens} tokens), skipping chunking")
+                summary = self._complete_with_progress(
+                    system_prompt,
+                    f"{user_prompt_prefix}\n\nFull Text:\n{paper_text}",
+                    self.max_response_tokens,
+                    f"Generating summary with {self.model}...",
+                    "Summary generation complete!"
+                )
             else:
                 # Paper exceeds token limits - process in chunks
-                logger.info(f"Paper exceeds token limits ({paper_tokens} tokens > {max_chunk_tokens} max). Processing in chunks.")
+                logger.info(f"Paper exceeds token limits (more than {max_chunk_tokens} tokens). Processing in chunks.")
                 self.log_memory_usage("before chunk processing")
                 
-                # Split the paper into chunks
-                try:
-                    chunks = self.chunk_text(paper_text, max_chunk_tokens, overlap_tokens=200)
-                    logger.info(f"Split paper into {len(chunks)} chunks")
-                    
-                    # Free up the original paper text to save memory
-                    del paper_text
-                    gc.collect()
-                    
-                    # Check if we got any chunks
-                    if not chunks:
-                        # If chunking failed, fall back to a simple approach
-                        logger.warning("Chunking failed or returned no chunks. Falling back to simplified summary.")
-                        # Create a simple summary with just metadata
-                        return self._create_fallback_summary(title, authors_text, abstract, safe_pub_date, safe_doi)
-                except Exception as e:
-                    logger.error(f"Error during chunking: {e}")
-                    # Fall back to a simple summary with just metadata
-                    return self._create_fallback_summary(title, authors_text, abstract, safe_pub_date, safe_doi)
-                
-                # Create a temporary directory for chunk summaries
-                temp_dir = tempfile.mkdtemp(prefix="biorxiv_summary_")
-                logger.info(f"Created temporary directory for chunk summaries: {temp_dir}")
-                
-                # Process each chunk and save to temporary files
-                chunk_summary_files = []
-                
-                # Process chunks in smaller batches to reduce memory pressure
-                batch_size = 3  # Process 3 chunks at a time
-                for batch_start in range(0, len(chunks), batch_size):
-                    batch_end = min(batch_start + batch_size, len(chunks))
-                    # Silently process chunks without logging
-                    
-                    # Process each chunk in this batch
-                    for i in range(batch_start, batch_end):
-                        # Process each chunk silently
-                        self.log_memory_usage(f"before processing chunk {i+1}")
-                        
-                        # Get the current chunk and immediately clear other chunks in memory
-                        current_chunk = chunks[i]
-                        
-                        # Set all other chunks in this batch to None to free memory
-                        for j in range(batch_start, batch_end):
-                            if j != i:
-                                chunks[j] = None
-                        
-                        # Force garbage collection
-                        gc.collect()
-                        
-                        # Prepare chunk-specific prompt
-                        if "{paper_text}" in user_prompt_prefix:
-                            # If the prompt has a {paper_text} placeholder, use that
-                            chunk_prompt = user_prompt_prefix.replace("{paper_text}", f"[PART {i+1} OF {len(chunks)}]\n{current_chunk}")
-                        else:
-                            # Otherwise append the chunk to the end
-                            chunk_prompt = f"{user_prompt_prefix}\n\nNote: This is part {i+1} of {len(chunks)} of the paper.\n\nFull Text:\n{current_chunk}"
-                        
-                        try:
-                            chunk_summary = self.generate_summary_for_chunk(
-                                current_chunk, 
-                                system_prompt, 
-                                chunk_prompt,
-                                max_tokens=1000
-                            )
-                            
-                            # Write chunk summary to temporary file immediately
-                            temp_file = os.path.join(temp_dir, f"chunk_{i+1}.txt")
-                            with open(temp_file, 'w', encoding='utf-8') as f:
-                                f.write(chunk_summary)
-                            chunk_summary_files.append(temp_file)
-                            logger.info(f"Saved chunk {i+1} summary to {temp_file}")
-                            
-                            # Free up memory immediately
-                            del chunk_summary
-                            del chunk_prompt
-                            del current_chunk
-                            gc.collect()
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing chunk {i+1}: {e}")
-                            # Continue with other chunks
-                        
-                        self.log_memory_usage(f"after processing chunk {i+1}")
-                    
-                    # After processing this batch, force garbage collection again
-                    gc.collect()
-                    self.log_memory_usage(f"after batch {batch_start+1}-{batch_end}")
-                
-                # Combine chunk summaries into a final summary, but process in batches
-                combined_summaries = ""
-                batch_size = 5  # Process 5 files at a time
+                # The remaining pages are extracted as the first chunks are being summarized
+                del paper_text
                 
-                for batch_start in range(0, len(chunk_summary_files), batch_size):
-                    batch_end = min(batch_start + batch_size, len(chunk_summary_files))
-                    logger.info(f"Combining summaries from files {batch_start+1}-{batch_end} of {len(chunk_summary_files)}")
-                    
-                    batch_summaries = ""
-                    for i in range(batch_start, batch_end):
-                        file_path = chunk_summary_files[i]
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                # Read in smaller segments to reduce memory pressure
-                                file_content = ""
-                                while True:
-                                    segment = f.read(5000)  # Read 5KB at a time (reduced from 10KB)
-                                    if not segment:
-                                        break
-                                    file_content += segment
-                                batch_summaries += file_content + "\n\n"
-                                
-                                # Free memory
-                                del file_content
-                        except Exception as e:
-                            logger.error(f"Error reading chunk summary file {file_path}: {e}")
-                    
-                    # Append batch summaries to combined summaries
-                    combined_summaries += batch_summaries
-                    
-                    # Free memory
-                    del batch_summaries
-                    gc.collect()
-                    self.log_memory_usage(f"after combining batch {batch_start+1}-{batch_end}")
+                chunk_system_prompt = self._chunk_system_prompt(system_prompt, user_prompt_prefix)
                 
-                self.log_memory_usage("after combining summaries")
+                # Summarize chunks as soon as they are extracted
+                chunk_summaries = asyncio.run(self._summarize_chunks_pipelined(
+                    itertools.chain(leading_pages, (page_text for page_text, _ in pages)),
+                    chunk_system_prompt,
+                    max_chunk_tokens
+                ))
+                del leading_pages
                 
-                # Clean up temporary files as soon as we're done with them
-                import shutil
-                try:
-                    shutil.rmtree(temp_dir)
-                    logger.info(f"Removed temporary directory: {temp_dir}")
-                except Exception as e:
-                    logger.error(f"Error removing temporary directory: {e}")
+                # Check if we got any chunk summaries
+                if not chunk_summaries:
+                    # If chunking failed, fall back to a simple approach
+                    logger.warning("Chunking failed or returned no chunks. Falling back to simplified summary.")
+                    # Create a simple summary with just metadata
+                    return self._create_fallback_summary(title, authors_text, abstract, safe_pub_date, safe_doi)
                 
                 # Generate a final consolidated summary
-                self.log_memory_usage("before final consolidation")
-                
-                # Check if combined summaries is too large using character count as a rough estimate first
-                # This avoids encoding the entire text at once which can use a lot of memory
-                # Calculate estimated tokens without logging
-                estimated_tokens = len(combined_summaries) / 4  # Rough estimate: ~4 chars per token
+                consolidation_prompt = self._consolidation_prompt(paper, chunk_summaries)
+                del chunk_summaries
                 
-                # If it's likely to be too large based on the estimate, truncate it
-                max_combined_tokens = 12000  # Maximum tokens for combined summaries
-                max_combined_chars = max_combined_tokens * 4  # Rough estimate in characters
+                self.log_memory_usage("before final API call")
                 
-                if len(combined_summaries) > max_combined_chars:
-                    logger.warning(f"Combined summaries likely too large (~{estimated_tokens:.0f} estimated tokens), truncating")
-                    
-                    # Truncate by preserving beginning and end based on character count first
-                    # This is more memory efficient than encoding the entire text
-                    first_part_size = int(max_combined_chars * 0.6)
-                    last_part_size = max_combined_chars - first_part_size
-                    
-                    first_part = combined_summaries[:first_part_size]
-                    last_part = combined_summaries[-last_part_size:]
-                    
-                    combined_summaries = first_part + "\n\n[...additional content omitted for length...]\n\n" + last_part
-                    
-                    # Free memory
-                    del first_part, last_part
-                    gc.collect()
-                    
-                    # Calculate actual token count without logging
-                    actual_tokens = self.num_tokens_from_string(combined_summaries, self.model)
-                    
-                    # If it's still too large, do a more precise truncation with tokens
-                    if actual_tokens > max_combined_tokens:
-                        logger.warning(f"Still too large after character truncation ({actual_tokens} tokens), performing token-based truncation")
-                        encoding = tiktoken.encoding_for_model(self.model)
-                        tokens = encoding.encode(combined_summaries)
-                        
-                        # Take first 60% and last 40% of tokens
-                        first_part_size = int(max_combined_tokens * 0.6)
-                        last_part_size = max_combined_tokens - first_part_size
-                        
-                        first_part = encoding.decode(tokens[:first_part_size])
-                        last_part = encoding.decode(tokens[-last_part_size:])
-                        
-                        combined_summaries = first_part + "\n\n[...additional content omitted for length...]\n\n" + last_part
-                        
-                        # Free memory
-                        del tokens, first_part, last_part
-                        gc.collect()
-                else:
-                    # If it's likely small enough, verify with actual token count
-                    actual_tokens = self.num_tokens_from_string(combined_summaries, self.model)
-                    logger.info(f"Actual combined summaries tokens: {actual_tokens}")
+                consolidation_system_prompt = _CONSOLIDATION_SYSTEM_PROMPT
                 
-                # Use a consolidation prompt that preserves the original custom prompt structure
-                if self.custom_prompt:
-                    # If using a custom prompt, create a consolidation prompt that maintains its structure
-                    consolidation_prompt = f"""You are provided with multiple summaries of different parts of the same scientific paper.
-                    Your task is to combine these summaries into a single coherent analysis following EXACTLY the structure and format of the template below.
-                    
-                    Paper Information:
-                    - Title: {title}
-                    - Authors: {authors_text}
-                    - DOI: {safe_doi}
-                    - Publication Date: {safe_pub_date}
-                    - Abstract: {abstract}
-                    
-                    Part Summaries (to be integrated):
-                    {combined_summaries}
-                    
-                    OUTPUT TEMPLATE (follow this EXACT structure):
-                    {prompt}
-                    """
+                if on_token is not None:
+                    summary = self._stream_completion(
+                        consolidation_system_prompt,
+                        consolidation_prompt,
+                        self.max_response_tokens,
+                        on_token
+                    )
                 else:
-                    # Default consolidation prompt
-                    consolidation_prompt = f"""You are provided with multiple summaries of different parts of the same scientific paper. 
-                    Combine these summaries into a single coherent summary that covers all the key aspects of the paper.
-                    Remove any redundancies and ensure the final summary is well-structured.
-                    
-                    Paper Title: {title}
-                    Authors: {authors_text}
-                    Abstract: {abstract}
-                    
-                    Part Summaries:
-                    {combined_summaries}
-                    """
-                
-                # Free memory before API call
-                del combined_summaries
-                gc.collect()
-                self.log_memory_usage("before final API call")
-                
-                try:
-                    # Create a stop event for the spinner
-                    stop_event = threading.Event()
-                    
-                    # Start the spinner animation in a separate thread
-                    spinner_thread = threading.Thread(
-                        target=self.spinner_animation, 
-                        args=(stop_event, f"Generating final summary...")
+                    summary = self._complete_with_progress(
+                        consolidation_system_prompt,
+                        consolidation_prompt,
+                        self.max_response_tokens,
+                        "Generating final summary...",
+                        "Final summary generation complete!"
                     )
-                    spinner_thread.daemon = True
-                    spinner_thread.start()
-                    
-                    if self.api_provider == "openai":
-                        # Make the API call
-                        response = self.client.chat.completions.create(
-                            model=self.model,
-                            messages=[
-                                {"role": "system", "content": "You are a scientific research assistant tasked with creating a comprehensive analysis of a scientific paper by combining multiple partial summaries. Follow the structure and format specified in the template EXACTLY."},
-                                {"role": "user", "content": consolidation_prompt}
-                            ],
-                            temperature=self.temperature,
-                            max_tokens=self.max_response_tokens,
-                        )
-                        
-                        summary = response.choices[0].message.content
-                    elif self.api_provider == "anthropic":
-                        # Make the API call
-                        message = self.client.messages.create(
-                            model=self.model,
-                            max_tokens=self.max_response_tokens,
-                            temperature=self.temperature,
-                            system="You are a scientific research assistant tasked with creating a comprehensive analysis of a scientific paper by combining multiple partial summaries. Follow the structure and format specified in the template EXACTLY.",
-                            messages=[
-                                {"role": "user", "content": consolidation_prompt}
-                            ]
-                        )
-                        
-                        summary = message.content[0].text
-                finally:
-                    # Stop the spinner animation
-                    stop_event.set()
-                    spinner_thread.join(timeout=1.0)
-                    print(f"\r{Fore.GREEN}Final summary generation complete!{Style.RESET_ALL}")
             
             # Add paper metadata as a header
-            final_summary = f"# {title}\n\n"
-            final_summary += f"**Authors:** {authors_text}\n\n"
-            final_summary += f"**Publication Date:** {safe_pub_date}\n\n"
-            final_summary += f"**DOI:** {safe_doi}\n\n"
-            final_summary += f"**Abstract:** {abstract}\n\n"
-            final_summary += "---\n\n"
-            final_summary += summary
+            final_summary = self._with_metadata_header(summary, title, authors_text, safe_pub_date, safe_doi, abstract)
+            
+            # Cache the summary; a near-duplicate's summary is already in the semantic cache
+            self._cache_summary(summary, summary_key, None if cached else paper_embedding)
             
             logger.info(f"{Fore.GREEN}Summary generated successfully{Style.RESET_ALL}")
             
             return final_summary
             
         except Exception as e:
-            error_message = str(e)
-            logger.error(f"Error generating summary: {error_message}")
+            logger.error(f"Error generating summary: {e}")
+            return _error_result(str(e))
+    
+    def summarize_batch(self, papers: List[Tuple[str, Dict[str, Any]]],
+                        max_pdf_pages: Optional[int] = None) -> List[Union[str, Dict[str, str]]]:
+        """
+        Summarize several papers through the provider's batch API.
+        
+        Batch requests cost half as much as regular requests and don't count against the rate
+        limits, but can take up to 24 hours to complete. The full-text and chunk requests of
+        all papers are submitted as one batch, then the consolidation requests of the chunked
+        papers as a second one. Pairwise merges of very long papers' chunk summaries and
+        fallback summaries are still requested directly.
+        
+        Args:
+            papers: (pdf_path, paper_metadata) pairs
+            max_pdf_pages: Maximum number of pages to extract from each PDF (None means all pages)
+            
+        Returns:
+            Generated summary or error information for each paper, in the same order
+        """
+        results: List[Union[str, Dict[str, str], None]] = [None] * len(papers)
+        prepared = {}
+        requests = {}
+        chunk_entries = {}
+        
+        def finish(index, summary):
+            paper, summary_key, paper_embedding = prepared[index]
+            self._cache_summary(summary, summary_key, paper_embedding)
+            results[index] = self._with_metadata_header(summary, paper["title"], paper["authors_text"],
+                                                        paper["pub_date"], paper["doi"], paper["abstract"])
+        
+        # Build the full-text request, or the chunk requests, of every paper. Request IDs are
+        # limited to letters, digits, '-' and '_' by the Anthropic API.
+        for index, (pdf_path, paper_metadata) in enumerate(papers):
+            try:
+                paper = self._prepare_paper(paper_metadata)
+                
+                summary_key = self._summary_key(pdf_path, max_pdf_pages)
+                if summary_key is not None:
+                    cached_summary = self.disk_cache.get("summaries", summary_key)
+                    if cached_summary is not None:
+                        logger.info(f"{Fore.GREEN}Using cached summary from a previous run for: {paper['title']}{Style.RESET_ALL}")
+                        results[index] = self._with_metadata_header(cached_summary, paper["title"], paper["authors_text"],
+                                                                    paper["pub_date"], paper["doi"], paper["abstract"])
+                        continue
+                
+                leading_pages, pages, paper_tokens = self._read_leading_pages(pdf_path, max_pdf_pages, paper["max_chunk_tokens"])
+                if not leading_pages:
+                    logger.error(f"Failed to extract text from PDF: {pdf_path}")
+                    results[index] = {"error": "extraction_failed", "message": "Failed to extract text from PDF"}
+                    continue
+                
+                paper_embedding = None
+                if self.summary_cache is not None:
+                    paper_embedding = self._embed_paper("\n\n".join(leading_pages))
+                    if paper_embedding is not None:
+                        summary = self.summary_cache.lookup(self._settings_hash, paper_embedding)
+                        if summary is not None:
+                            logger.info(f"{Fore.GREEN}Using cached summary of a near-duplicate paper for: {paper['title']}{Style.RESET_ALL}")
+                            prepared[index] = (paper, summary_key, None)
+                            finish(index, summary)
+                            continue
+                prepared[index] = (paper, summary_key, paper_embedding)
+                
+                if paper_tokens <= paper["max_chunk_tokens"]:
+                    requests[f"paper{index}-full"] = (
+                        self._system_prompt,
+                        f"{paper['user_prompt_prefix']}\n\nFull Text:\n" + "\n\n".join(leading_pages),
+                        self.max_response_tokens
+                    )
+                    continue
+                
+                # Reuse cached chunk summaries and request the rest
+                chunk_system_prompt = self._chunk_system_prompt(self._system_prompt, paper["user_prompt_prefix"])
+                paragraph_batches = (page.split("\n\n") for page in itertools.chain(leading_pages, (page_text for page_text, _ in pages)))
+                entries = []
+                for i, (chunk, chunk_tokens) in enumerate(self._pack_paragraphs(paragraph_batches, paper["max_chunk_tokens"], overlap_tokens=200)):
+                    note, max_tokens = self._chunk_request(i, chunk_tokens)
+                    user_prompt = f"{note}\n\nFull Text:\n{chunk}"
+                    chunk_key = self._chunk_key(chunk, max_tokens) if self.disk_cache is not None else None
+                    cached_summary = self.disk_cache.get("chunks", chunk_key) if chunk_key is not None else None
+                    custom_id = f"paper{index}-chunk{i}"
+                    if cached_summary is None:
+                        requests[custom_id] = (chunk_system_prompt, user_prompt, max_tokens)
+                    entries.append((custom_id, chunk_key, cached_summary))
+                chunk_entries[index] = entries
+                logger.info(f"Split paper into {len(entries)} chunks: {paper['title']}")
+            except Exception as e:
+                logger.error(f"Error preparing paper for the batch: {e}")
+                results[index] = _error_result(str(e))
+        
+        try:
+            completions = self._complete_batch(requests) if requests else {}
+        except Exception as e:
+            logger.error(f"Error running batch: {e}")
+            return [result if result is not None else _error_result(str(e)) for result in results]
+        
+        # Collect the full-text summaries and build the consolidation requests of chunked papers
+        consolidation_requests = {}
+        for index in prepared:
+            if results[index] is not None:
+                continue
+            paper = prepared[index][0]
             
-            # Check for specific error types
-            if "quota" in error_message.lower() or "limit" in error_message.lower():
-                return {"error": "quota_exceeded", "message": error_message}
-            elif "rate" in error_message.lower():
-                return {"error": "rate_limit", "message": error_message}
+            if index not in chunk_entries:
+                summary = completions.get(f"paper{index}-full")
+                if summary is None:
+                    results[index] = {"error": "api_error", "message": "Batch request failed"}
+                else:
+                    finish(index, summary)
+                continue
+            
+            chunk_summaries = []
+            for custom_id, chunk_key, cached_summary in chunk_entries[index]:
+                if cached_summary is not None:
+                    chunk_summaries.append(cached_summary)
+                elif custom_id in completions:
+                    chunk_summaries.append(completions[custom_id])
+                    if chunk_key is not None and completions[custom_id]:
+                        self.disk_cache.put("chunks", chunk_key, completions[custom_id])
+            
+            if not chunk_summaries:
+                logger.warning("No chunk summaries were generated. Falling back to simplified summary.")
+                results[index] = self._create_fallback_summary(paper["title"], paper["authors_text"], paper["abstract"],
+                                                               paper["pub_date"], paper["doi"])
+                continue
+            
+            try:
+                consolidation_requests[f"paper{index}-final"] = (
+                    _CONSOLIDATION_SYSTEM_PROMPT,
+                    self._consolidation_prompt(paper, chunk_summaries),
+                    self.max_response_tokens
+                )
+            except Exception as e:
+                logger.error(f"Error consolidating chunk summaries: {e}")
+                results[index] = _error_result(str(e))
+        
+        try:
+            completions = self._complete_batch(consolidation_requests) if consolidation_requests else {}
+        except Exception as e:
+            logger.error(f"Error running batch: {e}")
+            return [result if result is not None else _error_result(str(e)) for result in results]
+        
+        for custom_id in consolidation_requests:
+            index = int(custom_id[len("paper"):-len("-final")])
+            summary = completions.get(custom_id)
+            if summary is None:
+                results[index] = {"error": "api_error", "message": "Batch request failed"}
             else:
-                return {"error": "api_error", "message": error_message}
+                finish(index, summary)
+        
+        return results
     
-    def spinner_animation(self, stop_event, message):
+    def _with_metadata_header(self, summary: str, title: str, authors_text: str, pub_date: str,
+                              doi: str, abstract: str) -> str:
         """
-        Display a spinner animation in the console while waiting for a process to complete.
+        Prefix a summary with a Markdown header of the paper's metadata.
         
         Args:
-            stop_event: Threading event to signal when to stop the spinner
-            message: Message to display alongside the spinner
+            summary: The generated summary
+            title: Title of the paper
+            authors_text: Formatted author list
+            pub_date: Publication date
+            doi: DOI of the paper
+            abstract: Abstract of the paper
+            
+        Returns:
+            The summary with the metadata header
+        """
+        return (
+            f"# {title}\n\n"
+            f"**Authors:** {authors_text}\n\n"
+            f"**Publication Date:** {pub_date}\n\n"
+            f"**DOI:** {doi}\n\n"
+            f"**Abstract:** {abstract}\n\n"
+            "---\n\n"
+            f"{summary}"
+        )
+    
+    def _embed_paper(self, paper_text: str) -> Optional[List[float]]:
+        """
+        Embed the opening text of a paper for the summary cache.
+        
+        Args:
+            paper_text: Text extracted from the paper
+            
+        Returns:
+            The embedding, or None if it could not be created
         """
-        spinner_chars = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-        i = 0
         try:
-            while not stop_event.is_set():
-                sys.stdout.write(f"\r{Fore.BLUE}{message} {spinner_chars[i % len(spinner_chars)]}{Style.RESET_ALL}")
-                sys.stdout.flush()
-                i += 1
-                time.sleep(0.1)
-            # Clear the spinner line when done
-            sys.stdout.write("\r" + " " * (len(message) + 10) + "\r")
+            response = self.client.embeddings.create(
+                model="text-embedding-3-small",
+                input=paper_text[:8000]
+            )
+            return response.data[0].embedding
+        except Exception as e:
+            logger.warning(f"Could not embed paper for the summary cache: {e}")
+            return None
+    
+    async def _summarize_chunks_pipelined(self, pages: Iterable[str], system_prompt: str,
+                                          max_chunk_tokens: int) -> List[str]:
+        """
+        Summarize the chunks of a paper while the rest of it is still being extracted.
+        
+        A producer packs extracted pages into chunks and queues them; a pool of consumers
+        summarizes the queued chunks.
+        
+        Args:
+            pages: Iterator over the text of each page, possibly still reading the PDF
+            system_prompt: System prompt including the prompt template and paper metadata
+            max_chunk_tokens: Maximum tokens per chunk
+            
+        Returns:
+            Summaries of the chunks that were summarized successfully, in paper order
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=_CHUNK_WORKERS)
+        summaries = {}
+        
+        paragraph_batches = (page.split("\n\n") for page in pages)
+        chunks = self._pack_paragraphs(paragraph_batches, max_chunk_tokens, overlap_tokens=200)
+        
+        async def produce():
+            count = 0
+            while True:
+                # PDF extraction and tokenization block, so keep them off the event loop
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                await queue.put((count, chunk))
+                count += 1
+            for _ in range(_CHUNK_WORKERS):
+                await queue.put(None)
+            return count
+        
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                i, (chunk, chunk_tokens) = item
+                note, max_tokens = self._chunk_request(i, chunk_tokens)
+                try:
+                    chunk_summary = await loop.run_in_executor(
+                        None,
+                        self.generate_summary_for_chunk,
+                        chunk,
+                        system_prompt,
+                        note,
+                        max_tokens
+                    )
+                    summaries[i] = chunk_summary
+                    logger.info(f"Summarized chunk {i+1}")
+                except Exception as e:
+                    logger.error(f"Error processing chunk {i+1}: {e}")
+                    # Continue with other chunks
+        
+        count, *_ = await asyncio.gather(produce(), *[consume() for _ in range(_CHUNK_WORKERS)])
+        logger.info(f"Split paper into {count} chunks")
+        
+        return [summaries[i] for i in range(count) if i in summaries]
+    
+    def _complete_openai(self, system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+        """
+        Request a completion from the OpenAI API.
+        
+        Args:
+            system_prompt: System prompt for the API call
+            user_prompt: User prompt for the API call
+            max_tokens: Maximum tokens for the response
+            
+        Returns:
+            The generated text
+        """
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content
+    
+    def _complete_anthropic(self, system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+        """
+        Request a completion from the Anthropic API.
+        
+        Args:
+            system_prompt: System prompt for the API call
+            user_prompt: User prompt for the API call
+            max_tokens: Maximum tokens for the response
+            
+        Returns:
+            The generated text
+        """
+        message = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=self.temperature,
+            system=system_prompt,
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+        return message.content[0].text
+    
+    def _complete_batch_openai(self, requests: Dict[str, Tuple[str, str, int]]) -> Dict[str, str]:
+        """
+        Request completions through the OpenAI Batch API and wait for them.
+        
+        Args:
+            requests: (system prompt, user prompt, max tokens) of each request, by request ID
+            
+        Returns:
+            Generated text by request ID; requests that failed are missing
+        """
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "temperature": self.temperature,
+                    "max_tokens": max_tokens,
+                },
+            })
+            for custom_id, (system_prompt, user_prompt, max_tokens) in requests.items()
+        ]
+        batch_file = self.client.files.create(file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(_BATCH_POLL_SECONDS)
+            batch = self.client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            if counts is not None:
+                logger.info(f"Batch {batch.id} {batch.status}: {counts.completed}/{counts.total} requests completed")
+        
+        # An expired batch still returns the requests that completed in time
+        if not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} {batch.status} without results")
+        
+        results = {}
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") == 200:
+                results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            else:
+                logger.warning(f"Batch request {entry.get('custom_id')} failed: {entry.get('error') or response.get('body')}")
+        return results
+    
+    def _complete_batch_anthropic(self, requests: Dict[str, Tuple[str, str, int]]) -> Dict[str, str]:
+        """
+        Request completions through the Anthropic Message Batches API and wait for them.
+        
+        Args:
+            requests: (system prompt, user prompt, max tokens) of each request, by request ID
+            
+        Returns:
+            Generated text by request ID; requests that failed are missing
+        """
+        batch = self.client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": custom_id,
+                    "params": {
+                        "model": self.model,
+                        "max_tokens": max_tokens,
+                        "temperature": self.temperature,
+                        "system": system_prompt,
+                        "messages": [
+                            {"role": "user", "content": user_prompt}
+                        ],
+                    },
+                }
+                for custom_id, (system_prompt, user_prompt, max_tokens) in requests.items()
+            ]
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+        
+        while batch.processing_status != "ended":
+            time.sleep(_BATCH_POLL_SECONDS)
+            batch = self.client.messages.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            logger.info(f"Batch {batch.id} {batch.processing_status}: {counts.processing} requests still processing")
+        
+        results = {}
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                logger.warning(f"Batch request {entry.custom_id} {entry.result.type}")
+        return results
+    
+    def _stream_completion(self, system_prompt: str, user_prompt: str, max_tokens: int,
+                           on_token: Callable[[str], None]) -> str:
+        """
+        Stream a completion from the API, passing each piece of text to a callback as it arrives.
+        
+        Args:
+            system_prompt: System prompt for the API call
+            user_prompt: User prompt for the API call
+            max_tokens: Maximum tokens for the response
+            on_token: Callback receiving each piece of generated text
+            
+        Returns:
+            The full generated text
+        """
+        parts = []
+        
+        if self.api_provider == "openai":
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            for event in stream:
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    on_token(delta)
+        else:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=self.temperature,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ]
+            ) as stream:
+                for text in stream.text_stream:
+                    parts.append(text)
+                    on_token(text)
+        
+        return "".join(parts)
+    
+    def _merge_summaries(self, first: str, second: str, title: str, max_tokens: int = 1000) -> str:
+        """
+        Merge two partial summaries of the same paper into one.
+        
+        Args:
+            first: Summary of the earlier part of the paper
+            second: Summary of the later part of the paper
+            title: Title of the paper
+            max_tokens: Maximum tokens for the response
+            
+        Returns:
+            Combined summary, or both summaries concatenated if the API call fails
+        """
+        system_prompt = "You are a scientific research assistant combining partial summaries of a scientific paper."
+        user_prompt = (
+            f"Combine these two partial summaries of the paper \"{title}\" into a single summary. "
+            f"Keep every key finding, method, strength and limitation, and remove redundancies.\n\n"
+            f"Partial Summary 1:\n{first}\n\nPartial Summary 2:\n{second}"
+        )
+        
+        try:
+            return self._complete(system_prompt, user_prompt, max_tokens)
+        except Exception as e:
+            logger.error(f"Error merging partial summaries: {e}")
+            return f"{first}\n\n{second}"
+    
+    async def _reduce_summaries(self, summaries: List[str], title: str, max_combined_tokens: int) -> List[str]:
+        """
+        Merge partial summaries pairwise, level by level, until they fit the consolidation budget.
+        
+        Merges within a level are independent and run concurrently.
+        
+        Args:
+            summaries: Chunk summaries in paper order
+            title: Title of the paper
+            max_combined_tokens: Token budget for the combined summaries
+            
+        Returns:
+            Reduced list of summaries, still in paper order
+        """
+        loop = asyncio.get_running_loop()
+        
+        # Use the same estimate and margin as the truncation of the combined summaries, so a
+        # reduced list that is judged to fit is not truncated afterwards
+        while len(summaries) > 1:
+            combined = "\n\n".join(summaries)
+            if len(combined) * self._tokens_per_char(combined) <= max_combined_tokens * _TOKEN_ESTIMATE_MARGIN:
+                break
+            logger.info(f"Merging {len(summaries)} partial summaries pairwise")
+            pairs = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+            merged = await asyncio.gather(*[
+                loop.run_in_executor(None, self._merge_summaries, pair[0], pair[1], title)
+                for pair in pairs if len(pair) == 2
+            ])
+            if len(pairs[-1]) == 1:
+                merged.append(pairs[-1][0])
+            summaries = list(merged)
+        
+        return summaries
+    
+    def _complete_with_progress(self, system_prompt: str, user_prompt: str, max_tokens: int,
+                                message: str, done_message: str) -> str:
+        """
+        Request a long completion, showing how much of it has arrived so far.
+        
+        On a terminal the response is streamed, so progress is visible from the first token
+        instead of a spinner running until the whole response is done. When output is piped
+        or redirected, the completion is requested in one piece and only the completion
+        message is logged, so stdout stays free for whatever it is piped into.
+        
+        Args:
+            system_prompt: System prompt for the API call
+            user_prompt: User prompt for the API call
+            max_tokens: Maximum tokens for the response
+            message: Message to display alongside the progress
+            done_message: Message to show once the response is complete
+            
+        Returns:
+            The generated text
+        """
+        if not sys.stdout.isatty():
+            summary = self._complete(system_prompt, user_prompt, max_tokens)
+            logger.info(done_message)
+            return summary
+        
+        received = 0
+        
+        def show_progress(text):
+            nonlocal received
+            received += len(text)
+            sys.stdout.write(f"\r{Fore.BLUE}{message} {received} characters received{Style.RESET_ALL}")
             sys.stdout.flush()
-        except Exception:
-            pass
+        
+        sys.stdout.write(f"\r{Fore.BLUE}{message}{Style.RESET_ALL}")
+        sys.stdout.flush()
+        try:
+            return self._stream_completion(system_prompt, user_prompt, max_tokens, show_progress)
+        finally:
+            # Clear the progress line
+            sys.stdout.write("\r" + " " * (len(message) + 40) + "\r")
+            print(f"{Fore.GREEN}{done_message}{Style.RESET_ALL}")
     
     def _create_fallback_summary(self, title, authors, abstract, pub_date, doi):
         """Create a fallback summary when chunking or processing fails."""
@@ -1065,52 +1818,22 @@ class PaperSummarizer:
             # Create a simple summary with just the metadata and abstract
             logger.info("Creating fallback summary with metadata and abstract")
             
-            fallback_summary = f"# {title}\n\n"
-            fallback_summary += f"**Authors:** {authors}\n\n"
-            fallback_summary += f"**Publication Date:** {pub_date}\n\n"
-            fallback_summary += f"**DOI:** {doi}\n\n"
-            fallback_summary += f"**Abstract:** {abstract}\n\n"
-            fallback_summary += "---\n\n"
-            fallback_summary += "## Summary\n\n"
-            fallback_summary += "*Note: This is a simplified summary based on the paper's abstract due to processing limitations.*\n\n"
+            note = "## Summary\n\n*Note: This is a simplified summary based on the paper's abstract due to processing limitations.*\n\n"
             
             # Try to generate a brief summary from the abstract if possible
             try:
                 system_prompt = "You are a scientific research assistant tasked with summarizing bioRxiv preprints based on their abstracts."
                 user_prompt = f"Please provide a brief summary of the following scientific paper based on its abstract:\n\nTitle: {title}\nAuthors: {authors}\nAbstract: {abstract}"
                 
-                if self.api_provider == "openai":
-                    response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        temperature=self.temperature,
-                        max_tokens=1000,
-                    )
-                    
-                    abstract_summary = response.choices[0].message.content
-                elif self.api_provider == "anthropic":
-                    message = self.client.messages.create(
-                        model=self.model,
-                        max_tokens=1000,
-                        temperature=self.temperature,
-                        system=system_prompt,
-                        messages=[
-                            {"role": "user", "content": user_prompt}
-                        ]
-                    )
-                    
-                    abstract_summary = message.content[0].text
+                abstract_summary = self._complete(system_prompt, user_prompt, 1000)
                 
-                fallback_summary += abstract_summary
+                fallback_body = note + abstract_summary
             except Exception as e:
                 logger.error(f"Error generating abstract summary: {e}")
-                fallback_summary += "Unable to generate a summary from the abstract due to an error.\n\n"
-                fallback_summary += f"Please refer to the abstract above for information about this paper."
+                fallback_body = (note + "Unable to generate a summary from the abstract due to an error.\n\n"
+                                 "Please refer to the abstract above for information about this paper.")
             
-            return fallback_summary
+            return self._with_metadata_header(fallback_body, title, authors, pub_date, doi, abstract)
             
         except Exception as e:
             logger.error(f"Error creating fallback summary: {e}")
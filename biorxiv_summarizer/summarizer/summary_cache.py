@@ -0,0 +1,193 @@
+"""
+On-disk caches for extracted text and paper summaries.
+
+DiskCache stores text under exact keys (e.g. a hash of the PDF plus the model and
+prompt), so re-running on the same PDFs is nearly free.
+
+Revisions of a preprint (v1, v2, ...) usually differ by only a few percent of their
+text, so an exact hash of the PDF misses them. SemanticSummaryCache stores each
+summary with an embedding of the paper's opening text, and a lookup returns the
+summary of the most similar cached paper if it is close enough.
+"""
+
+import os
+import json
+import math
+import hashlib
+import logging
+from typing import Dict, Any, Optional, List
+
+# Get logger
+logger = logging.getLogger('biorxiv_summarizer')
+
+def file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file, reading it in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def text_sha256(*parts: str) -> str:
+    """Return the SHA-256 hex digest of one or more strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class DiskCache:
+    """Directory of cached text files, grouped by kind and named by key."""
+
+    def __init__(self, cache_dir: str):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory the cached files are stored in (created on first write)
+        """
+        self.cache_dir = os.path.expanduser(cache_dir)
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, kind, f"{key}.txt")
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        """
+        Read a cached entry.
+
+        Args:
+            kind: Kind of entry (e.g. "text" or "summaries")
+            key: Key of the entry, usually a hash
+
+        Returns:
+            The cached text, or None if there is no entry
+        """
+        try:
+            with open(self._path(kind, key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read cache entry {kind}/{key}: {e}")
+            return None
+
+    def put(self, kind: str, key: str, text: str):
+        """
+        Write a cache entry, replacing any previous one atomically.
+
+        Args:
+            kind: Kind of entry (e.g. "text" or "summaries")
+            key: Key of the entry, usually a hash
+            text: Text to cache
+        """
+        path = self._path(kind, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write cache entry {kind}/{key}: {e}")
+
+class SemanticSummaryCache:
+    """Least-recently-used cache of summaries keyed by paper embeddings."""
+
+    def __init__(self, cache_path: str, similarity_threshold: float = 0.97, max_entries: int = 256):
+        """
+        Initialize the cache, loading any entries previously saved to disk.
+
+        Args:
+            cache_path: Path to the JSON file the cache is persisted to
+            similarity_threshold: Minimum cosine similarity for a cached summary to be reused
+            max_entries: Maximum number of summaries to keep; the least recently used are evicted
+        """
+        self.cache_path = os.path.expanduser(cache_path)
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+
+        # Entries are kept in order of use, least recently used first
+        self.entries: List[Dict[str, Any]] = []
+
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+                logger.info(f"Loaded {len(self.entries)} cached summaries from {self.cache_path}")
+            except Exception as e:
+                logger.warning(f"Could not load summary cache from {self.cache_path}: {e}")
+                self.entries = []
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> List[float]:
+        """Scale an embedding to unit length so a dot product gives cosine similarity."""
+        norm = math.sqrt(sum(x * x for x in embedding))
+        return [x / norm for x in embedding] if norm else list(embedding)
+
+    def lookup(self, key: str, embedding: List[float]) -> Optional[str]:
+        """
+        Find the cached summary of the paper most similar to the given one.
+
+        Args:
+            key: Identifies the settings the summary was generated with (model, prompt, etc.)
+            embedding: Embedding of the paper's text
+
+        Returns:
+            The cached summary, or None if no cached paper is similar enough
+        """
+        query = self._normalize(embedding)
+        best_index, best_score = None, -1.0
+
+        for i, entry in enumerate(self.entries):
+            if entry["key"] != key:
+                continue
+            score = sum(a * b for a, b in zip(query, entry["embedding"]))
+            if score > best_score:
+                best_index, best_score = i, score
+
+        if best_index is None or best_score < self.similarity_threshold:
+            return None
+
+        logger.info(f"Found cached summary with similarity {best_score:.3f}")
+
+        # Mark the entry as most recently used. The new order is only written with the next
+        # added summary, so a run of cache hits doesn't rewrite the whole file each time; an
+        # order lost when no summary is added only affects which entry is evicted first.
+        entry = self.entries.pop(best_index)
+        self.entries.append(entry)
+
+        return entry["summary"]
+
+    def add(self, key: str, embedding: List[float], summary: str):
+        """
+        Add a summary to the cache and save the cache to disk.
+
+        Args:
+            key: Identifies the settings the summary was generated with (model, prompt, etc.)
+            embedding: Embedding of the paper's text
+            summary: The generated summary
+        """
+        self.entries.append({
+            "key": key,
+            "embedding": self._normalize(embedding),
+            "summary": summary
+        })
+
+        # Evict the least recently used summaries
+        if len(self.entries) > self.max_entries:
+            del self.entries[:len(self.entries) - self.max_entries]
+
+        self.save()
+
+    def save(self):
+        """Write the cache to disk, replacing the previous file atomically."""
+        try:
+            cache_dir = os.path.dirname(os.path.abspath(self.cache_path))
+            os.makedirs(cache_dir, exist_ok=True)
+
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"Could not save summary cache to {self.cache_path}: {e}")
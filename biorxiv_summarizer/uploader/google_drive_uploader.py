@@ -9,7 +9,9 @@ import os
 import io
 import json
 import logging
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple, Union
 from colorama import Fore, Style
 
 # Google Drive API libraries
@@ -25,6 +27,25 @@ logger = logging.getLogger('biorxiv_summarizer')
 # Define scopes for Google Drive API
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
+# Number of times a request is retried after a rate limit (403 rateLimitExceeded or 429) or
+# server error; the client library backs off exponentially between attempts
+_UPLOAD_RETRIES = 3
+
+# Files up to this size are sent with their metadata in a single multipart request; a resumable
+# upload costs an extra round trip to open the upload session, which only pays off for large files
+_RESUMABLE_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+# Larger files are sent in chunks of this size, so a transient failure only repeats one chunk
+_UPLOAD_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Credentials and Drive service by credentials path, shared by every uploader in the process so
+# the token is loaded, refreshed and the service built only once
+_sessions: Dict[str, Tuple[Credentials, object]] = {}
+_sessions_lock = threading.Lock()
+
+# Drive allows about 10 writes per second per user, so concurrent uploads are capped well below that
+_MAX_UPLOAD_WORKERS = 8
+
 class GoogleDriveUploader:
     """Class to upload files to Google Drive."""
     
@@ -36,7 +57,27 @@ class GoogleDriveUploader:
             credentials_path: Path to the OAuth credentials JSON file
         """
         self.credentials_path = credentials_path
-        self.service = self._authenticate()
+        self.credentials = None
+        
+        # Reuse the session of an earlier uploader with the same credentials while it is valid;
+        # google-auth refreshes an expired token on the next request if it has a refresh token
+        session_key = os.path.abspath(credentials_path)
+        with _sessions_lock:
+            session = _sessions.get(session_key)
+            if session is not None and (session[0].valid or session[0].refresh_token):
+                self.credentials, self.service = session
+            else:
+                self.service = self._authenticate()
+                _sessions[session_key] = (self.credentials, self.service)
+        
+        # The HTTP transport behind a Drive service is not thread-safe, so upload threads
+        # each build their own service from the same credentials
+        self._thread_local = threading.local()
+        
+        # Thread pool of upload_files, created on first use and kept until close() so its
+        # threads (and the services they built) are reused across calls
+        self._executor = None
+        self._executor_lock = threading.Lock()
     
     def _authenticate(self):
         """
@@ -80,15 +121,27 @@ class GoogleDriveUploader:
                     logger.error(f"Error during authentication: {e}")
                     raise ValueError(f"Failed to authenticate with Google Drive: {e}")
         
-        # Build the Drive service
+        # Build the Drive service from the discovery document bundled with the client library,
+        # instead of downloading it, and skip the on-disk discovery cache that would go unused
+        self.credentials = creds
         try:
-            service = build('drive', 'v3', credentials=creds)
+            service = build('drive', 'v3', credentials=creds, static_discovery=True, cache_discovery=False)
             logger.info(f"{Fore.GREEN}Successfully authenticated with Google Drive{Style.RESET_ALL}")
             return service
         except Exception as e:
             logger.error(f"Error building Drive service: {e}")
             raise ValueError(f"Failed to build Drive service: {e}")
     
+    def _service(self):
+        """Return the Drive service for the calling thread."""
+        if threading.current_thread() is threading.main_thread():
+            return self.service
+        service = getattr(self._thread_local, 'service', None)
+        if service is None:
+            service = build('drive', 'v3', credentials=self.credentials, static_discovery=True, cache_discovery=False)
+            self._thread_local.service = service
+        return service
+    
     def create_folder(self, folder_name: str, parent_id: Optional[str] = None):
         """
         Create a folder in Google Drive.
@@ -143,6 +196,30 @@ class GoogleDriveUploader:
             logger.error(f"Error creating folder: {e}")
             return None
     
+    def _execute_upload(self, request, media):
+        """
+        Execute an upload request, sending resumable uploads one chunk at a time.
+        
+        Each chunk is retried on its own after a transient failure, so an interrupted
+        upload resumes where it stopped instead of starting over.
+        
+        Args:
+            request: The files().create request
+            media: The media being uploaded
+            
+        Returns:
+            The response to the request
+        """
+        if not media.resumable():
+            return request.execute(num_retries=_UPLOAD_RETRIES)
+        
+        response = None
+        while response is None:
+            status, response = request.next_chunk(num_retries=_UPLOAD_RETRIES)
+            if status:
+                logger.debug(f"Uploaded {int(status.progress() * 100)}%")
+        return response
+    
     def upload_file(self, file_path: str, folder_id: Optional[str] = None):
         """
         Upload a file to Google Drive.
@@ -168,16 +245,17 @@ class GoogleDriveUploader:
             # Create media
             media = MediaFileUpload(
                 file_path,
-                resumable=True
+                chunksize=_UPLOAD_CHUNK_BYTES,
+                resumable=os.path.getsize(file_path) > _RESUMABLE_THRESHOLD_BYTES
             )
             
             # Upload file
             logger.info(f"Uploading {file_name} to Google Drive...")
-            file = self.service.files().create(
+            file = self._execute_upload(self._service().files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id'
-            ).execute()
+            ), media)
             
             file_id = file.get('id')
             logger.info(f"{Fore.GREEN}Uploaded file: {file_name} (ID: {file_id}){Style.RESET_ALL}")
@@ -188,12 +266,50 @@ class GoogleDriveUploader:
             logger.error(f"Error uploading file: {e}")
             return None
     
-    def upload_text_as_file(self, text: str, filename: str, folder_id: Optional[str] = None):
+    def upload_files(self, file_paths: List[str], folder_id: Optional[str] = None,
+                     max_workers: int = 4) -> List[Optional[str]]:
+        """
+        Upload several files to Google Drive concurrently.
+        
+        Uploads spend nearly all their time waiting on the network, so running a few at
+        once finishes N files in about N / max_workers of the sequential time. The uploads
+        run on a thread pool kept by the uploader, so call close() when done with it.
+        
+        Args:
+            file_paths: Paths to the files to upload
+            folder_id: ID of the folder to upload to (optional)
+            max_workers: Maximum number of concurrent uploads (capped at 8); only the first
+                call that starts the thread pool sets its size
+            
+        Returns:
+            ID of each uploaded file, or None for files that failed, in the same order
+        """
+        if len(file_paths) <= 1:
+            return [self.upload_file(path, folder_id) for path in file_paths]
+        
+        with self._executor_lock:
+            if self._executor is None:
+                workers = max(1, min(max_workers, _MAX_UPLOAD_WORKERS))
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drive-upload")
+            executor = self._executor
+        return list(executor.map(lambda path: self.upload_file(path, folder_id), file_paths))
+    
+    def close(self):
+        """Wait for running uploads to finish and stop the upload threads."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+    
+    def upload_text_as_file(self, text: Union[str, bytes], filename: str, folder_id: Optional[str] = None):
         """
         Upload text content as a file to Google Drive.
         
+        To upload text that has already been saved, use upload_file, which streams the
+        file from disk instead of holding the content in memory.
+        
         Args:
-            text: Text content to upload
+            text: Text content to upload, as a string or already encoded as UTF-8 bytes
             filename: Name for the file
             folder_id: ID of the folder to upload to (optional)
             
@@ -208,20 +324,23 @@ class GoogleDriveUploader:
             if folder_id:
                 file_metadata['parents'] = [folder_id]
             
-            # Create media from text content
+            # Create media from text content; BytesIO shares the bytes' buffer until it is
+            # written to, so encoded content is not copied again
+            content = text if isinstance(text, bytes) else text.encode('utf-8')
             media = MediaIoBaseUpload(
-                io.BytesIO(text.encode('utf-8')),
+                io.BytesIO(content),
                 mimetype='text/plain',
-                resumable=True
+                chunksize=_UPLOAD_CHUNK_BYTES,
+                resumable=len(content) > _RESUMABLE_THRESHOLD_BYTES
             )
             
             # Upload file
             logger.info(f"Uploading {filename} to Google Drive...")
-            file = self.service.files().create(
+            file = self._execute_upload(self._service().files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id'
-            ).execute()
+            ), media)
             
             file_id = file.get('id')
             logger.info(f"{Fore.GREEN}Uploaded file: {filename} (ID: {file_id}){Style.RESET_ALL}")
@@ -29,11 +29,18 @@ class ColoredFormatter(logging.Formatter):
 class PaperMetadataFilter(logging.Filter):
     """Filter out paper metadata debug messages when in verbose mode."""
     
+    # Every paper metadata message starts with one of these
+    PREFIXES = ('Paper keys:', 'Paper category:', 'Paper type:', 'Paper collection:', 'Paper tags:')
+    
     def filter(self, record):
-        # Filter out certain verbose debug messages about paper metadata
-        if record.levelno == logging.DEBUG and any(x in record.getMessage() for x in ['Paper keys:', 'Paper category:', 'Paper type:', 'Paper collection:', 'Paper tags:']):
-            return False
-        return True
+        # Only debug messages are filtered, so other records are passed without formatting them
+        if record.levelno != logging.DEBUG:
+            return True
+        
+        # Filter out certain verbose debug messages about paper metadata; messages logged
+        # without arguments are already complete, so they don't need to be formatted
+        message = record.getMessage() if record.args else str(record.msg)
+        return not message.startswith(self.PREFIXES)
 
 
 def setup_logging(args):
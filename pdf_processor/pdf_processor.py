@@ -12,13 +12,14 @@ import os
 import logging
 import re
 import math
-import gc
-import tempfile
 import argparse
+import asyncio
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Union, Tuple
-import PyPDF2
-from openai import OpenAI
+import pypdfium2 as pdfium
+from openai import OpenAI, AsyncOpenAI
 from colorama import Fore, Style
 import tiktoken
 import psutil
@@ -26,6 +27,140 @@ import psutil
 # Get logger
 logger = logging.getLogger('pdf_processor')
 
+# Context window sizes by model name; versioned model names match on the longest known prefix
+_MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo-16k": 16384,
+    "gpt-3.5-turbo": 16385,
+}
+_DEFAULT_CONTEXT_TOKENS = 4096
+
+# Default prompt based on scientific_paper_prompt.md
+_DEFAULT_PROMPT = """
+            # Expert Analysis: {title}
+
+            You are a senior scientific researcher with decades of experience as a principal investigator, journal editor, and study section reviewer in biology/bioinformatics. Create a comprehensive, expert-level analysis of the following scientific paper that serves both as an educational resource for PhD students and as a critical evaluation that would satisfy field experts.
+
+            ## 1. Paper Context and Significance
+            - **Research Domain:** [Identify the precise subfield classification]
+            - **Scientific Question:** [Identify the specific scientific gap or question being addressed]
+            - **Background Context:** [Provide brief historical context of this research question]
+            - **Key Technologies/Methods:** [Describe core methodological approaches with technical specificity]
+
+            ## 2. Accessible Summary for Early-Career Researchers
+            [Provide a 3-4 paragraph explanation of the core research, written for a first-year PhD student. Balance accessibility with scientific precision. Define specialized terminology when first used. Highlight what makes this work novel or important in the broader context of the field.]
+
+            ## 3. Key Findings and Contributions
+            - **Primary Findings:** [List the most important results with quantitative details where relevant]
+            - **Methodological Innovations:** [Describe any novel methods or techniques introduced]
+            - **Conceptual Advances:** [Explain theoretical or conceptual contributions]
+            - **Resource Generation:** [Note any datasets, tools, or resources produced]
+
+            ## 4. Critical Analysis
+            - **Strengths:** [Identify the major strengths of the paper]
+            - **Limitations:** [Discuss methodological limitations, interpretative issues, or gaps]
+            - **Alternative Interpretations:** [Consider alternative explanations for the findings]
+            - **Unanswered Questions:** [Identify important questions left unaddressed]
+
+            ## 5. Impact and Future Directions
+            - **Field Impact:** [Assess how this work advances the field]
+            - **Broader Implications:** [Consider implications beyond the immediate research area]
+            - **Follow-up Studies:** [Suggest logical next steps for this research]
+            - **Technical Improvements:** [Recommend methodological refinements]
+
+            Format your analysis in Markdown with clear headings and bullet points where appropriate.
+            """
+
+# Labels of the paper metadata block appended to every prompt (values excluded)
+_METADATA_BLOCK = "\n\nPaper Metadata:\nTitle: \nAuthors: \nDate: \nDOI: \n\nAbstract:\n"
+
+# PDFs with at most this many pages are extracted in this process. Starting worker processes
+# (which re-import this module and its dependencies under the spawn start method) costs more than
+# extracting a typical preprint, so only long documents such as theses use the process pool.
+_SERIAL_EXTRACTION_PAGES = 100
+
+# PDFs smaller than this are always extracted in this process, whatever their page count; a
+# typical bioRxiv preprint is well under this size and has little text per page to parallelize
+_SMALL_PDF_BYTES = 512 * 1024
+
+# Upper bound on extraction worker processes
+_MAX_EXTRACTION_WORKERS = 4
+
+# Times the API clients retry a rate-limited (429) or failed request, waiting as long as the
+# Retry-After header asks, before raising
+_API_MAX_RETRIES = 6
+
+# Metadata placeholders supported in prompt templates, in either {TITLE} or {title} form
+_PLACEHOLDER_RE = re.compile(r"\{(TITLE|AUTHORS|ABSTRACT|DATE|DOI|JOURNAL|title|authors|abstract|date|doi|journal)\}")
+
+def _model_context_tokens(model: str) -> int:
+    """Return the context window size for a model, falling back to a conservative default."""
+    model = model.lower()
+    if model in _MODEL_CONTEXT_TOKENS:
+        return _MODEL_CONTEXT_TOKENS[model]
+    prefix = max((k for k in _MODEL_CONTEXT_TOKENS if model.startswith(k)), key=len, default=None)
+    return _MODEL_CONTEXT_TOKENS[prefix] if prefix else _DEFAULT_CONTEXT_TOKENS
+
+def _get_encoding(model: str) -> "tiktoken.Encoding":
+    """Get the tiktoken encoding for a model, falling back to cl100k_base for models tiktoken doesn't know."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Fallback to cl100k_base encoding (used by gpt-4, gpt-3.5-turbo, text-embedding-ada-002)
+        return tiktoken.get_encoding("cl100k_base")
+
+def _extract_pages(pdf_path: str, start: int, stop: int) -> List[Tuple[str, Optional[str]]]:
+    """
+    Extract the text of a range of PDF pages.
+    
+    This is a module-level function so that it can be run in worker processes. Each
+    worker opens the PDF once for its whole range of pages.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        start: Zero-based index of the first page to extract
+        stop: Index one past the last page to extract
+        
+    Returns:
+        List of (page text, error message) tuples, one per page; the error is None if
+        extraction succeeded
+    """
+    try:
+        pdf = pdfium.PdfDocument(pdf_path)
+    except Exception as e:
+        return [("", str(e))] * (stop - start)
+    try:
+        return [_extract_open_page(pdf, i) for i in range(start, stop)]
+    finally:
+        pdf.close()
+
+def _extract_open_page(pdf: pdfium.PdfDocument, page_index: int) -> Tuple[str, Optional[str]]:
+    """
+    Extract the text of a single page of an already open PDF.
+    
+    Args:
+        pdf: The open PDF document
+        page_index: Zero-based index of the page to extract
+        
+    Returns:
+        Tuple of the page text and an error message (None if extraction succeeded)
+    """
+    try:
+        page = pdf[page_index]
+        textpage = page.get_textpage()
+        page_text = textpage.get_text_range()
+        
+        # Release the page's native buffers immediately
+        textpage.close()
+        page.close()
+        
+        return page_text, None
+    except Exception as e:
+        return "", str(e)
+
 class PDFProcessor:
     """Class to extract text from PDFs and generate summaries."""
     
@@ -47,7 +182,7 @@ class PDFProcessor:
         # Initialize OpenAI client if API key is provided
         self.client = None
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = OpenAI(api_key=self.api_key, max_retries=_API_MAX_RETRIES)
         
         # Set temperature for API calls
         self.temperature = temperature
@@ -55,6 +190,17 @@ class PDFProcessor:
         # Set the model to use
         self.model = model
         
+        # Handle for reading this process's memory usage
+        self._process = psutil.Process()
+        
+        # Look up the tokenizer once; it is used for every token count and chunk
+        self._encoding = _get_encoding(self.model)
+        
+        # The system prompt and context window are the same for every paper, so size them once
+        self._system_prompt = "You are a scientific research assistant tasked with summarizing scientific papers. Provide clear, concise, and accurate summaries that highlight the key findings, methods, strengths, limitations, and implications of the research."
+        self._system_tokens = self.num_tokens_from_string(self._system_prompt, self.model)
+        self._model_max_tokens = _model_context_tokens(self.model)
+        
         # Set output directory
         self.output_dir = output_dir
         
@@ -74,24 +220,31 @@ class PDFProcessor:
             except Exception as e:
                 logger.error(f"Error loading custom prompt: {e}")
                 logger.info("Using default prompt instead.")
+        
+        # The prompt template is the same for every paper, so count its tokens and placeholders once;
+        # only the metadata substituted into it needs to be counted per paper
+        self._prompt_template = self.custom_prompt or _DEFAULT_PROMPT
+        self._prompt_template_tokens = self.num_tokens_from_string(self._prompt_template + _METADATA_BLOCK, self.model)
+        self._placeholder_counts = Counter(m.group(1).upper() for m in _PLACEHOLDER_RE.finditer(self._prompt_template))
     
-    def log_memory_usage(self, label: str = ""):
-        """Calculate current memory usage of the process without logging to stdout."""
-        process = psutil.Process()
-        memory_info = process.memory_info()
+    def log_memory_usage(self, label: str = "") -> Optional[float]:
+        """Log current memory usage of the process at debug level, returning it in MB (None when debug logging is off)."""
+        # Reading the memory usage is a system call, so skip it unless it will be logged
+        if not logger.isEnabledFor(logging.DEBUG):
+            return None
+        memory_info = self._process.memory_info()
         memory_mb = memory_info.rss / 1024 / 1024
-        # Memory usage is now only returned, not logged
+        logger.debug(f"Memory usage {label}: {memory_mb:.1f} MB")
         return memory_mb
         
     def num_tokens_from_string(self, string: str, model: str = "gpt-3.5-turbo") -> int:
         """Returns the number of tokens in a text string."""
-        encoding = tiktoken.encoding_for_model(model)
-        num_tokens = len(encoding.encode(string))
-        return num_tokens
+        encoding = self._encoding if model == self.model else _get_encoding(model)
+        return len(encoding.encode_ordinary(string))
 
     def extract_text_from_pdf(self, pdf_path: str, max_pages: int = 30) -> str:
         """
-        Extract text from a PDF file using a file-based approach to minimize memory usage.
+        Extract text from a PDF file.
         
         Args:
             pdf_path: Path to the PDF file
@@ -103,81 +256,62 @@ class PDFProcessor:
         logger.info(f"Extracting text from PDF: {pdf_path}")
         self.log_memory_usage("before PDF extraction")
         
-        # Create a temporary directory for extracted text
-        temp_dir = tempfile.mkdtemp(prefix="pdf_text_")
-        output_file = os.path.join(temp_dir, "extracted_text.txt")
-        
         try:
-            # Open the output file for writing
-            with open(output_file, 'w', encoding='utf-8') as out_file:
-                # Open the PDF file
-                with open(pdf_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
-                    num_pages = len(reader.pages)
-                    
-                    # Limit the number of pages to process
-                    pages_to_process = min(num_pages, max_pages)
-                    logger.info(f"Processing {pages_to_process} pages out of {num_pages} total")
-                    
-                    # Extract text from each page individually to minimize memory usage
-                    batch_size = 1  # Process 1 page at a time for minimum memory usage
-                    
-                    for i in range(0, pages_to_process):
-                        try:
-                            logger.info(f"Processing page {i+1} of {pages_to_process}")
-                            
-                            # Extract text from this page
-                            page = reader.pages[i]
-                            page_text = page.extract_text()
-                            
-                            # Write directly to file
-                            if page_text:
-                                out_file.write(page_text)
-                                out_file.write("\n\n")
-                            
-                            # Free memory immediately
-                            del page
-                            del page_text
-                            
-                            # Force garbage collection every few pages
-                            if i % 3 == 0:
-                                gc.collect()
-                                
-                        except Exception as e:
-                            logger.warning(f"Error extracting text from page {i+1}: {e}")
-            
-            # Now read the file back in small chunks to check if we got any text
-            with open(output_file, 'r', encoding='utf-8') as f:
-                # Just check the first few bytes to see if there's any content
-                sample = f.read(1000)
-                if not sample.strip():
-                    logger.warning("No text could be extracted from the PDF")
-                    return ""
+            # Opening the PDF only parses its header, so this is cheap
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                num_pages = len(pdf)
+                
+                # Limit the number of pages to process
+                pages_to_process = min(num_pages, max_pages)
+                logger.info(f"Processing {pages_to_process} pages out of {num_pages} total")
+                
+                # Typical preprints (small files or few pages, and anything on a single core)
+                # are extracted from the already open document
+                max_workers = min(_MAX_EXTRACTION_WORKERS, os.cpu_count() or 1)
+                parallel = (pages_to_process > _SERIAL_EXTRACTION_PAGES and max_workers > 1
+                            and os.path.getsize(pdf_path) >= _SMALL_PDF_BYTES)
+                if not parallel:
+                    results = [_extract_open_page(pdf, i) for i in range(pages_to_process)]
+            finally:
+                pdf.close()
             
-            # Read the entire file back into memory
-            with open(output_file, 'r', encoding='utf-8') as f:
-                text = f.read()
+            if parallel:
+                # Pages are independent, so extract them in parallel on a few cores. Each
+                # worker gets a contiguous range of pages so it opens the PDF only once, and
+                # the results are collected in page order.
+                step = -(-pages_to_process // max_workers)
+                starts = range(0, pages_to_process, step)
+                stops = [min(start + step, pages_to_process) for start in starts]
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    results = [
+                        result
+                        for page_results in executor.map(_extract_pages, [pdf_path] * len(starts), starts, stops)
+                        for result in page_results
+                    ]
             
-            # Clean up temporary files
-            try:
-                os.unlink(output_file)
-                os.rmdir(temp_dir)
-            except Exception as e:
-                logger.error(f"Error cleaning up temporary files: {e}")
+            parts = []
+            for i, (page_text, error) in enumerate(results):
+                if error:
+                    logger.warning(f"Error extracting text from page {i+1}: {error}")
+                    continue
                 
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Extracted page {i+1} of {pages_to_process}")
+                
+                if page_text:
+                    parts.append(page_text)
+                    parts.append("\n\n")
+            
+            text = "".join(parts)
+            if not text.strip():
+                logger.warning("No text could be extracted from the PDF")
+                return ""
+            
             return text
                 
         except Exception as e:
             logger.error(f"Error processing PDF: {e}")
-            
-            # Clean up temporary files
-            try:
-                if os.path.exists(output_file):
-                    os.unlink(output_file)
-                os.rmdir(temp_dir)
-            except Exception as cleanup_error:
-                logger.error(f"Error cleaning up temporary files: {cleanup_error}")
-                
             return ""
     
     def save_text_to_markdown(self, text: str, output_path: str) -> bool:
@@ -205,163 +339,64 @@ class PDFProcessor:
             logger.error(f"Error saving text to file: {e}")
             return False
             
-    def chunk_text(self, text: str, max_chunk_tokens: int, overlap_tokens: int = 100) -> List[str]:
+    def _chunk_token_ids(self, token_ids: List[int], max_chunk_tokens: int, overlap_tokens: int = 100) -> List[str]:
         """
-        Split text into chunks that fit within token limits.
+        Split encoded text into overlapping windows of tokens and decode each one.
         
         Args:
-            text: The text to split into chunks
+            token_ids: The encoded text
             max_chunk_tokens: Maximum tokens per chunk
             overlap_tokens: Number of tokens to overlap between chunks
             
         Returns:
             List of text chunks
         """
-        self.log_memory_usage("before chunking")
-        
-        # Use an extremely small segment size to minimize memory usage
-        segment_size = 2000  # characters per segment (extremely small to prevent memory spikes)
-        
         # If max_chunk_tokens is negative, set a reasonable default
         if max_chunk_tokens <= 0:
             logger.warning(f"Invalid max_chunk_tokens: {max_chunk_tokens}, setting to 2000")
             max_chunk_tokens = 2000
         
-        # Estimate total tokens based on character count
-        estimated_tokens = len(text) / 4  # Rough estimate: ~4 chars per token
-        logger.info(f"Estimated tokens in text: ~{estimated_tokens:.0f} (based on character count)")
+        if not token_ids:
+            return []
         
-        # Check if we need to chunk at all
-        if len(text) < max_chunk_tokens * 3:  # Using a conservative estimate
-            # Create a temporary file to store the text
-            temp_fd, temp_file = tempfile.mkstemp(suffix='.txt')
-            try:
-                with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                
-                # Free the original text from memory
-                del text
-                gc.collect()
-                
-                # Now read the file in small chunks to check token count
-                with open(temp_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                # Initialize encoding only when needed
-                encoding = tiktoken.encoding_for_model(self.model)
-                actual_tokens = len(encoding.encode(content))
-                
-                if actual_tokens <= max_chunk_tokens:
-                    logger.info(f"Text fits in one chunk ({actual_tokens} tokens)")
-                    return [content]  # No chunking needed
-                    
-                # If we get here, we need to chunk after all
-                del content
-                gc.collect()
-                
-            except Exception as e:
-                logger.error(f"Error checking if chunking is needed: {e}")
-            finally:
-                # Clean up the temporary file
-                try:
-                    os.unlink(temp_file)
-                except Exception as e:
-                    logger.error(f"Error removing temporary file: {e}")
+        # Keep the overlap small enough that every chunk makes progress
+        overlap_tokens = max(0, min(overlap_tokens, max_chunk_tokens // 2))
+        stride = max_chunk_tokens - overlap_tokens
         
-        # If we get here, we need to chunk the text
-        logger.info("Proceeding with text chunking")
+        # Start a new chunk only while it would contain tokens beyond the overlap
+        return [
+            self._encoding.decode(token_ids[start:start + max_chunk_tokens])
+            for start in range(0, max(len(token_ids) - overlap_tokens, 1), stride)
+        ]
+    
+    def chunk_text(self, text: str, max_chunk_tokens: int, overlap_tokens: int = 100) -> List[str]:
+        """
+        Split text into chunks that fit within token limits.
         
-        # Create a temporary directory to store chunks
-        chunk_dir = tempfile.mkdtemp(prefix="pdf_text_chunks_")
-        logger.info(f"Created temporary directory for text chunks: {chunk_dir}")
+        The text is encoded once and the token IDs are sliced into windows, so chunk
+        sizes are exact.
         
-        # Process text in tiny segments to minimize memory usage
-        chunk_files = []
-        current_chunk = ""
-        current_chunk_size = 0
-        chunk_count = 0
+        Args:
+            text: The text to split into chunks
+            max_chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Number of tokens to overlap between chunks
+            
+        Returns:
+            List of text chunks
+        """
+        self.log_memory_usage("before chunking")
         
         try:
-            # Initialize encoding
-            encoding = tiktoken.encoding_for_model(self.model)
-            
-            # Process text in very small segments
-            for i in range(0, len(text), segment_size):
-                # Log progress periodically
-                if i % (segment_size * 10) == 0:
-                    logger.info(f"Chunking progress: {i}/{len(text)} characters processed ({i/len(text)*100:.1f}%)")
-                    self.log_memory_usage(f"during chunking at position {i}")
-                
-                # Get the current segment
-                segment = text[i:i+segment_size]
-                
-                # Encode this segment to get token count
-                segment_tokens = encoding.encode(segment)
-                
-                # Check if adding this segment would exceed the chunk size
-                if current_chunk_size + len(segment_tokens) > max_chunk_tokens:
-                    # Save the current chunk to a file
-                    if current_chunk:
-                        chunk_count += 1
-                        chunk_file = os.path.join(chunk_dir, f"chunk_{chunk_count}.txt")
-                        with open(chunk_file, 'w', encoding='utf-8') as f:
-                            f.write(current_chunk)
-                        chunk_files.append(chunk_file)
-                        
-                        # Reset current chunk
-                        del current_chunk
-                        current_chunk = ""
-                        current_chunk_size = 0
-                        gc.collect()
-                
-                # Add this segment to the current chunk
-                current_chunk += segment
-                current_chunk_size += len(segment_tokens)
-                
-                # Free memory
-                del segment
-                del segment_tokens
-                gc.collect()
+            token_ids = self._encoding.encode_ordinary(text)
+            chunks = self._chunk_token_ids(token_ids, max_chunk_tokens, overlap_tokens)
             
-            # Save the last chunk if there's anything left
-            if current_chunk:
-                chunk_count += 1
-                chunk_file = os.path.join(chunk_dir, f"chunk_{chunk_count}.txt")
-                with open(chunk_file, 'w', encoding='utf-8') as f:
-                    f.write(current_chunk)
-                chunk_files.append(chunk_file)
-            
-            # Free the original text from memory completely
-            del text
-            del current_chunk
-            gc.collect()
-            
-            # Now read the chunks back from files
-            chunks = []
-            for file_path in chunk_files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        chunk_content = f.read()
-                        chunks.append(chunk_content)
-                except Exception as e:
-                    logger.error(f"Error reading chunk file {file_path}: {e}")
+            if len(chunks) <= 1:
+                logger.info(f"Text fits in one chunk ({len(token_ids)} tokens)")
+                return [text]  # No chunking needed
             
             logger.info(f"Split text into {len(chunks)} chunks")
             self.log_memory_usage("after chunking")
             
-            # Clean up temporary files
-            for file_path in chunk_files:
-                try:
-                    os.unlink(file_path)
-                except Exception as e:
-                    logger.error(f"Error removing chunk file {file_path}: {e}")
-            
-            try:
-                os.rmdir(chunk_dir)
-                logger.info(f"Removed temporary chunk directory: {chunk_dir}")
-            except Exception as e:
-                logger.error(f"Error removing temporary chunk directory: {e}")
-            
             return chunks
             
         except Exception as e:
@@ -401,6 +436,63 @@ class PDFProcessor:
             logger.error(f"Error generating chunk summary: {e}")
             raise e
     
+    async def _summarize_chunk_async(self, client: AsyncOpenAI, chunk: str, system_prompt: str,
+                                     user_prompt_prefix: str, max_tokens: int = 1000) -> str:
+        """
+        Generate a summary for a single chunk of text without blocking the event loop.
+        
+        Args:
+            client: Async OpenAI client bound to the running event loop
+            chunk: Text chunk to summarize
+            system_prompt: System prompt for the API call
+            user_prompt_prefix: Prefix for the user prompt (metadata, etc.)
+            max_tokens: Maximum tokens for the response
+            
+        Returns:
+            Summary of the chunk
+        """
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt_prefix.replace("{paper_text}", chunk) if "{paper_text}" in user_prompt_prefix else f"{user_prompt_prefix}\n\nFull Text:\n{chunk}"}
+            ],
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+        )
+        
+        return response.choices[0].message.content
+    
+    async def _summarize_all(self, chunks: List[str], system_prompt: str, user_prompt_prefix: str,
+                             max_tokens: int = 1000, max_concurrency: int = 8) -> List[Optional[str]]:
+        """
+        Summarize all chunks concurrently, with at most ``max_concurrency`` requests in flight.
+        
+        Args:
+            chunks: Text chunks to summarize
+            system_prompt: System prompt for the API calls
+            user_prompt_prefix: Prefix for the user prompt (metadata, etc.)
+            max_tokens: Maximum tokens for each response
+            max_concurrency: Maximum number of concurrent API requests
+            
+        Returns:
+            Summary of each chunk in order, or None for chunks that failed
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # Each call runs in a new event loop (asyncio.run), and an async client's connections
+        # belong to the loop that opened them, so the client lives only as long as this loop
+        async with AsyncOpenAI(api_key=self.api_key, max_retries=_API_MAX_RETRIES) as client:
+            async def bounded(i: int, chunk: str) -> Optional[str]:
+                async with semaphore:
+                    try:
+                        return await self._summarize_chunk_async(client, chunk, system_prompt, user_prompt_prefix, max_tokens)
+                    except Exception as e:
+                        logger.error(f"Error processing chunk {i+1}: {e}")
+                        return None
+            
+            return await asyncio.gather(*[bounded(i, chunk) for i, chunk in enumerate(chunks)])
+    
     def _create_fallback_summary(self, title: str, metadata: Dict[str, Any]) -> str:
         """
         Create a fallback summary when chunking or processing fails.
@@ -412,20 +504,22 @@ class PDFProcessor:
         Returns:
             A simple summary based on available metadata
         """
-        fallback = f"# Summary of: {title}\n\n"
-        fallback += "## Note\n\nThis is a simplified summary as the full text processing was not possible.\n\n"
+        fallback_parts = [
+            f"# Summary of: {title}\n\n",
+            "## Note\n\nThis is a simplified summary as the full text processing was not possible.\n\n"
+        ]
         
         # Add metadata if available
         if metadata.get('authors'):
-            fallback += f"**Authors:** {metadata.get('authors', 'Unknown')}\n\n"
+            fallback_parts.append(f"**Authors:** {metadata.get('authors', 'Unknown')}\n\n")
         
         if metadata.get('abstract'):
-            fallback += f"## Abstract\n\n{metadata.get('abstract', 'No abstract available')}\n\n"
+            fallback_parts.append(f"## Abstract\n\n{metadata.get('abstract', 'No abstract available')}\n\n")
         
-        fallback += "## Processing Error\n\nThe full text could not be processed due to technical limitations. "
-        fallback += "This summary contains only the metadata that was available.\n"
+        fallback_parts.append("## Processing Error\n\nThe full text could not be processed due to technical limitations. "
+                              "This summary contains only the metadata that was available.\n")
         
-        return fallback
+        return "".join(fallback_parts)
     
     def generate_summary(self, text: str, metadata: Dict[str, Any] = None) -> str:
         """
@@ -455,79 +549,45 @@ class PDFProcessor:
         pub_date = metadata.get('date', 'Unknown Date')
         doi = metadata.get('doi', 'No DOI available')
         
-        # Construct the prompt
-        if self.custom_prompt:
-            # Use custom prompt if provided
-            prompt = self.custom_prompt
-        else:
-            # Default prompt based on scientific_paper_prompt.md
-            prompt = """
-            # Expert Analysis: {title}
-
-            You are a senior scientific researcher with decades of experience as a principal investigator, journal editor, and study section reviewer in biology/bioinformatics. Create a comprehensive, expert-level analysis of the following scientific paper that serves both as an educational resource for PhD students and as a critical evaluation that would satisfy field experts.
-
-            ## 1. Paper Context and Significance
-            - **Research Domain:** [Identify the precise subfield classification]
-            - **Scientific Question:** [Identify the specific scientific gap or question being addressed]
-            - **Background Context:** [Provide brief historical context of this research question]
-            - **Key Technologies/Methods:** [Describe core methodological approaches with technical specificity]
-
-            ## 2. Accessible Summary for Early-Career Researchers
-            [Provide a 3-4 paragraph explanation of the core research, written for a first-year PhD student. Balance accessibility with scientific precision. Define specialized terminology when first used. Highlight what makes this work novel or important in the broader context of the field.]
-
-            ## 3. Key Findings and Contributions
-            - **Primary Findings:** [List the most important results with quantitative details where relevant]
-            - **Methodological Innovations:** [Describe any novel methods or techniques introduced]
-            - **Conceptual Advances:** [Explain theoretical or conceptual contributions]
-            - **Resource Generation:** [Note any datasets, tools, or resources produced]
-
-            ## 4. Critical Analysis
-            - **Strengths:** [Identify the major strengths of the paper]
-            - **Limitations:** [Discuss methodological limitations, interpretative issues, or gaps]
-            - **Alternative Interpretations:** [Consider alternative explanations for the findings]
-            - **Unanswered Questions:** [Identify important questions left unaddressed]
-
-            ## 5. Impact and Future Directions
-            - **Field Impact:** [Assess how this work advances the field]
-            - **Broader Implications:** [Consider implications beyond the immediate research area]
-            - **Follow-up Studies:** [Suggest logical next steps for this research]
-            - **Technical Improvements:** [Recommend methodological refinements]
-
-            Format your analysis in Markdown with clear headings and bullet points where appropriate.
-            """
-        
-        # Replace placeholders in the prompt - handle both formats {TITLE} and {title}
-        prompt = prompt.replace("{TITLE}", title).replace("{title}", title)
-        prompt = prompt.replace("{AUTHORS}", authors).replace("{authors}", authors)
-        prompt = prompt.replace("{ABSTRACT}", abstract).replace("{abstract}", abstract)
-        prompt = prompt.replace("{DATE}", pub_date).replace("{date}", pub_date)
-        prompt = prompt.replace("{DOI}", doi).replace("{doi}", doi)
-        prompt = prompt.replace("{JOURNAL}", journal).replace("{journal}", journal)
+        # Start from the custom or default prompt template
+        prompt = self._prompt_template
+        
+        # Replace placeholders in the prompt in a single pass - handle both formats {TITLE} and {title}
+        placeholder_values = {
+            "TITLE": title,
+            "AUTHORS": authors,
+            "ABSTRACT": abstract,
+            "DATE": pub_date,
+            "DOI": doi,
+            "JOURNAL": journal,
+        }
+        prompt = _PLACEHOLDER_RE.sub(lambda m: placeholder_values[m.group(1).upper()], prompt)
         
         # Handle paper_text placeholder
         if "{paper_text}" in prompt:
             logger.info("Found {paper_text} placeholder in prompt, will replace with actual paper text")
         
         # System prompt for all API calls
-        system_prompt = "You are a scientific research assistant tasked with summarizing scientific papers. Provide clear, concise, and accurate summaries that highlight the key findings, methods, strengths, limitations, and implications of the research."
+        system_prompt = self._system_prompt
         
         # User prompt prefix (metadata and instructions)
         user_prompt_prefix = f"{prompt}\n\nPaper Metadata:\nTitle: {title}\nAuthors: {authors}\nDate: {pub_date}\nDOI: {doi}\n\nAbstract:\n{abstract}"
         
-        # Calculate token counts
-        system_tokens = self.num_tokens_from_string(system_prompt, self.model)
-        prefix_tokens = self.num_tokens_from_string(user_prompt_prefix, self.model)
+        # Calculate token counts; the prefix is the pre-counted template plus each metadata value
+        # once per placeholder, and once more in the metadata block (except the journal)
+        system_tokens = self._system_tokens
+        metadata_tokens = [len(ids) for ids in self._encoding.encode_ordinary_batch([str(v) for v in placeholder_values.values()])]
+        prefix_tokens = self._prompt_template_tokens + sum(
+            tokens * (self._placeholder_counts[field] + (field != "JOURNAL"))
+            for field, tokens in zip(placeholder_values, metadata_tokens)
+        )
         
         # Reserve tokens for the response and some overhead
         reserved_tokens = 3000  # for the model's response
         overhead_tokens = 100   # for formatting, etc.
         
         # Calculate maximum tokens available for the paper text
-        model_max_tokens = 16000 if "gpt-4" in self.model else 4000  # Adjust based on the model
-        if "32k" in self.model:
-            model_max_tokens = 32000
-        elif "16k" in self.model:
-            model_max_tokens = 16000
+        model_max_tokens = self._model_max_tokens
         
         max_chunk_tokens = model_max_tokens - system_tokens - prefix_tokens - reserved_tokens - overhead_tokens
         
@@ -544,8 +604,9 @@ class PDFProcessor:
         logger.info(f"{Fore.BLUE}Generating summary using {self.model}{Style.RESET_ALL}")
         
         try:
-            # Always calculate exact token count before deciding to chunk
-            paper_tokens = self.num_tokens_from_string(text, self.model)
+            # Encode the paper once; the token IDs give both the exact count and the chunk boundaries
+            paper_token_ids = self._encoding.encode_ordinary(text)
+            paper_tokens = len(paper_token_ids)
             logger.info(f"Actual paper text tokens: {paper_tokens}")
             
             if paper_tokens <= max_chunk_tokens:
@@ -568,13 +629,10 @@ class PDFProcessor:
                 
                 # Split the paper into chunks
                 try:
-                    chunks = self.chunk_text(text, max_chunk_tokens, overlap_tokens=200)
+                    chunks = self._chunk_token_ids(paper_token_ids, max_chunk_tokens, overlap_tokens=200)
+                    del paper_token_ids
                     logger.info(f"Split paper into {len(chunks)} chunks")
                     
-                    # Free up the original paper text to save memory
-                    del text
-                    gc.collect()
-                    
                     # Check if we got any chunks
                     if not chunks:
                         # If chunking failed, fall back to a simple approach
@@ -586,94 +644,29 @@ class PDFProcessor:
                     # Fall back to a simple summary with just metadata
                     return self._create_fallback_summary(title, metadata)
                 
-                # Create a temporary directory for chunk summaries
-                temp_dir = tempfile.mkdtemp(prefix="pdf_summary_")
-                logger.info(f"Created temporary directory for chunk summaries: {temp_dir}")
+                # Summarize all chunks concurrently, skipping any that failed
+                chunk_summaries = asyncio.run(self._summarize_all(chunks, system_prompt, user_prompt_prefix, reserved_tokens))
+                chunk_summaries = [chunk_summary for chunk_summary in chunk_summaries if chunk_summary is not None]
                 
-                # Process each chunk and save to temporary files
-                chunk_summary_files = []
-                
-                # Process chunks in smaller batches to reduce memory pressure
-                batch_size = 3  # Process 3 chunks at a time
-                for batch_start in range(0, len(chunks), batch_size):
-                    batch_end = min(batch_start + batch_size, len(chunks))
-                    
-                    # Process each chunk in this batch
-                    for i in range(batch_start, batch_end):
-                        self.log_memory_usage(f"before processing chunk {i+1}")
-                        
-                        # Get the current chunk and immediately clear other chunks in memory
-                        current_chunk = chunks[i]
-                        
-                        try:
-                            # Generate summary for this chunk
-                            chunk_summary = self.generate_summary_for_chunk(
-                                current_chunk,
-                                system_prompt,
-                                user_prompt_prefix,
-                                max_tokens=reserved_tokens
-                            )
-                            
-                            # Save this chunk summary to a file
-                            chunk_summary_file = os.path.join(temp_dir, f"summary_chunk_{i+1}.txt")
-                            with open(chunk_summary_file, 'w', encoding='utf-8') as f:
-                                f.write(chunk_summary)
-                            chunk_summary_files.append(chunk_summary_file)
-                            
-                            # Free memory
-                            del chunk_summary
-                            gc.collect()
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing chunk {i+1}: {e}")
-                        
-                        # Free memory
-                        del current_chunk
-                        gc.collect()
-                
-                # Free chunks from memory
-                del chunks
-                gc.collect()
-                
-                # Combine the chunk summaries
-                combined_summary = f"# Summary of: {title}\n\n"
+                # Combine the chunk summaries, collecting the parts in a list and joining them once
+                summary_parts = [f"# Summary of: {title}\n\n"]
                 
                 # Add metadata
-                combined_summary += f"**Authors:** {authors}\n\n"
+                summary_parts.append(f"**Authors:** {authors}\n\n")
                 if abstract:
-                    combined_summary += f"**Abstract:** {abstract}\n\n"
+                    summary_parts.append(f"**Abstract:** {abstract}\n\n")
                 
-                combined_summary += "## Combined Summary\n\n"
-                combined_summary += "*This paper was processed in multiple chunks due to its length. The following is a combined summary of all chunks.*\n\n"
-                
-                # Read and combine all chunk summaries
-                for i, file_path in enumerate(chunk_summary_files):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            chunk_content = f.read()
-                        
-                        # Add a section header for each chunk
-                        combined_summary += f"### Chunk {i+1} Summary\n\n"
-                        combined_summary += chunk_content
-                        combined_summary += "\n\n---\n\n"
-                        
-                    except Exception as e:
-                        logger.error(f"Error reading chunk summary file {file_path}: {e}")
+                summary_parts.append("## Combined Summary\n\n")
+                summary_parts.append("*This paper was processed in multiple chunks due to its length. The following is a combined summary of all chunks.*\n\n")
                 
-                # Clean up temporary files
-                for file_path in chunk_summary_files:
-                    try:
-                        os.unlink(file_path)
-                    except Exception as e:
-                        logger.error(f"Error removing chunk summary file {file_path}: {e}")
-                
-                try:
-                    os.rmdir(temp_dir)
-                    logger.info(f"Removed temporary summary directory: {temp_dir}")
-                except Exception as e:
-                    logger.error(f"Error removing temporary summary directory: {e}")
+                # Combine all chunk summaries
+                for i, chunk_summary in enumerate(chunk_summaries):
+                    # Add a section header for each chunk
+                    summary_parts.append(f"### Chunk {i+1} Summary\n\n")
+                    summary_parts.append(chunk_summary)
+                    summary_parts.append("\n\n---\n\n")
                 
-                summary = combined_summary
+                summary = "".join(summary_parts)
             
             return summary
             
@@ -17,9 +17,10 @@ setup(
         "google-api-python-client",
         "google-auth-httplib2",
         "google-auth-oauthlib",
-        "openai",
+        "openai>=1.18.0",
+        "anthropic>=0.41.0",
         "python-dotenv",
-        "PyPDF2",
+        "pypdfium2",
         "colorama",
     ],
     entry_points={
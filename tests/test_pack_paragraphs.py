@@ -0,0 +1,128 @@
+"""
+Tests for PaperSummarizer._pack_paragraphs.
+
+A stub encoding that treats each word as one token stands in for tiktoken, so the
+tests need no network access or API keys.
+"""
+
+import pytest
+
+from biorxiv_summarizer.summarizer.paper_summarizer import PaperSummarizer
+
+
+class WordEncoding:
+    """Encoding with one token per whitespace-separated word."""
+
+    def encode_ordinary(self, text):
+        return text.split()
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def make_summarizer():
+    """Return a summarizer with only what _pack_paragraphs uses, without creating API clients."""
+    summarizer = PaperSummarizer.__new__(PaperSummarizer)
+    summarizer._encoding = WordEncoding()
+    return summarizer
+
+
+def paragraph(index, words):
+    """Return a paragraph of ``words`` distinct words, identifiable by ``index``."""
+    return " ".join(f"p{index}w{i}" for i in range(words))
+
+
+def make_pages():
+    """Return pages of paragraphs of varied sizes, including one larger than a chunk."""
+    sizes = [12, 30, 7, 45, 20, 3, 18, 250, 9, 33, 16, 40, 5, 27, 11, 60, 8]
+    paragraphs = [paragraph(i, size) for i, size in enumerate(sizes)]
+    return [paragraphs[i:i + 4] for i in range(0, len(paragraphs), 4)]
+
+
+def split_paragraphs(chunk):
+    return chunk.split("\n\n")
+
+
+def test_chunks_never_exceed_max_tokens():
+    summarizer = make_summarizer()
+    chunks = list(summarizer._pack_paragraphs(make_pages(), max_chunk_tokens=100, overlap_tokens=25))
+
+    assert len(chunks) > 1
+    for chunk, tokens in chunks:
+        assert tokens == len(chunk.split())
+        assert tokens <= 100
+
+
+def test_oversize_paragraph_is_split_on_token_boundaries():
+    summarizer = make_summarizer()
+    long_paragraph = paragraph(0, 250)
+    chunks = list(summarizer._pack_paragraphs([[long_paragraph]], max_chunk_tokens=100, overlap_tokens=25))
+
+    assert [tokens for _, tokens in chunks] == [100, 100, 50]
+    assert " ".join(chunk for chunk, _ in chunks) == long_paragraph
+
+
+def test_consecutive_chunks_overlap_by_at_least_overlap_tokens():
+    summarizer = make_summarizer()
+    # Uniform 10-token paragraphs always leave room for the full overlap
+    pages = [[paragraph(page * 5 + i, 10) for i in range(5)] for page in range(6)]
+    chunks = [chunk for chunk, _ in summarizer._pack_paragraphs(pages, max_chunk_tokens=100, overlap_tokens=25)]
+
+    assert len(chunks) > 2
+    for previous, current in zip(chunks, chunks[1:]):
+        previous_paragraphs = split_paragraphs(previous)
+        current_paragraphs = split_paragraphs(current)
+        shared = max(
+            (k for k in range(1, min(len(previous_paragraphs), len(current_paragraphs)) + 1)
+             if previous_paragraphs[-k:] == current_paragraphs[:k]),
+            default=0
+        )
+        overlap = sum(len(p.split()) for p in current_paragraphs[:shared])
+        assert overlap >= 25
+
+
+def test_overlap_is_trimmed_to_fit_the_next_paragraph():
+    summarizer = make_summarizer()
+    pages = [[paragraph(0, 40), paragraph(1, 40), paragraph(2, 90)]]
+    chunks = list(summarizer._pack_paragraphs(pages, max_chunk_tokens=100, overlap_tokens=30))
+
+    assert [tokens for _, tokens in chunks] == [80, 90]
+    assert chunks[1][0] == paragraph(2, 90)
+
+
+@pytest.mark.parametrize("overlap_tokens", [0, 25, 60])
+def test_output_does_not_depend_on_batching(overlap_tokens):
+    summarizer = make_summarizer()
+    pages = make_pages()
+    all_paragraphs = [p for page in pages for p in page]
+
+    per_page = list(summarizer._pack_paragraphs(pages, 100, overlap_tokens))
+    one_batch = list(summarizer._pack_paragraphs([all_paragraphs], 100, overlap_tokens))
+    per_paragraph = list(summarizer._pack_paragraphs(([p] for p in all_paragraphs), 100, overlap_tokens))
+
+    assert per_page == one_batch == per_paragraph
+
+
+def test_batches_are_consumed_lazily():
+    summarizer = make_summarizer()
+    consumed = []
+
+    def pages():
+        for i in range(10):
+            consumed.append(i)
+            yield [paragraph(i, 60)]
+
+    chunks = summarizer._pack_paragraphs(pages(), max_chunk_tokens=100, overlap_tokens=0)
+    next(chunks)
+
+    assert len(consumed) < 10
+
+
+def test_blank_paragraphs_are_dropped():
+    summarizer = make_summarizer()
+    chunks = list(summarizer._pack_paragraphs([["", "one two", "  \n "], ["three"]], 100))
+
+    assert chunks == [("one two\n\nthree", 3)]
@@ -0,0 +1,97 @@
+"""
+Tests for SemanticSummaryCache: the similarity threshold, LRU eviction and persistence.
+"""
+
+import json
+
+from biorxiv_summarizer.summarizer.summary_cache import SemanticSummaryCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return SemanticSummaryCache(str(tmp_path / "summaries.json"), **kwargs)
+
+
+def test_lookup_returns_summary_above_threshold(tmp_path):
+    cache = make_cache(tmp_path, similarity_threshold=0.97)
+    cache.add("settings", [1.0, 0.0, 0.0], "summary")
+
+    # Cosine similarity of about 0.995; scale does not matter
+    assert cache.lookup("settings", [10.0, 1.0, 0.0]) == "summary"
+
+
+def test_lookup_misses_below_threshold(tmp_path):
+    cache = make_cache(tmp_path, similarity_threshold=0.97)
+    cache.add("settings", [1.0, 0.0, 0.0], "summary")
+
+    # Cosine similarity of about 0.96
+    assert cache.lookup("settings", [1.0, 0.3, 0.0]) is None
+
+
+def test_lookup_ignores_entries_with_other_settings(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.add("settings", [1.0, 0.0], "summary")
+
+    assert cache.lookup("other settings", [1.0, 0.0]) is None
+
+
+def test_lookup_returns_most_similar_entry(tmp_path):
+    cache = make_cache(tmp_path, similarity_threshold=0.9)
+    cache.add("settings", [1.0, 0.2], "close")
+    cache.add("settings", [1.0, 0.0], "closest")
+
+    assert cache.lookup("settings", [1.0, 0.01]) == "closest"
+
+
+def test_least_recently_added_entry_is_evicted(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.add("settings", [1.0, 0.0, 0.0], "first")
+    cache.add("settings", [0.0, 1.0, 0.0], "second")
+    cache.add("settings", [0.0, 0.0, 1.0], "third")
+
+    assert len(cache.entries) == 2
+    assert cache.lookup("settings", [1.0, 0.0, 0.0]) is None
+    assert cache.lookup("settings", [0.0, 1.0, 0.0]) == "second"
+    assert cache.lookup("settings", [0.0, 0.0, 1.0]) == "third"
+
+
+def test_lookup_protects_entry_from_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.add("settings", [1.0, 0.0, 0.0], "first")
+    cache.add("settings", [0.0, 1.0, 0.0], "second")
+
+    # Using the first entry makes the second the least recently used
+    assert cache.lookup("settings", [1.0, 0.0, 0.0]) == "first"
+    cache.add("settings", [0.0, 0.0, 1.0], "third")
+
+    assert cache.lookup("settings", [1.0, 0.0, 0.0]) == "first"
+    assert cache.lookup("settings", [0.0, 1.0, 0.0]) is None
+
+
+def test_entries_are_saved_on_add_and_reloaded(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.add("settings", [3.0, 4.0], "summary")
+
+    with open(cache.cache_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved[0]["summary"] == "summary"
+    assert saved[0]["embedding"] == [0.6, 0.8]
+
+    assert make_cache(tmp_path).lookup("settings", [3.0, 4.0]) == "summary"
+
+
+def test_lookup_does_not_write_the_file(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.add("settings", [1.0, 0.0], "summary")
+
+    # Replace the saved file; a lookup that saved would overwrite it
+    (tmp_path / "summaries.json").write_text("[]", encoding="utf-8")
+    assert cache.lookup("settings", [1.0, 0.0]) == "summary"
+
+    assert (tmp_path / "summaries.json").read_text(encoding="utf-8") == "[]"
+
+
+def test_cache_path_expands_user_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    cache = SemanticSummaryCache("~/summaries.json")
+
+    assert cache.cache_path == str(tmp_path / "summaries.json")